@@ -240,9 +240,7 @@ function InstructorDashboard() {
             {/* Leaderboard: Top Trainee Progress */}
             <div style={{ flex: 1, minWidth: 260, maxWidth: 400, display: 'flex', flexDirection: 'column', justifyContent: 'center' }}>
               <h4 style={{ color: '#fff', fontWeight: 700, marginBottom: 16 }}>Top Trainee Progress</h4>
-              {dashboardData.trainees
-                .sort((a, b) => b.completion_percentage - a.completion_percentage)
-                .slice(0, 5)
+              {dashboardData.top_trainees
                 .map((trainee, idx) => (
                   <div key={trainee.id} style={{ display: 'flex', alignItems: 'center', marginBottom: 18, background: 'rgba(255,255,255,0.04)', borderRadius: 10, padding: 12 }}>
                     <div style={{
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../../contexts/AuthContext';
-import axiosInstance from '../../utils/axios';
+import axiosInstance, { fetchLatestMessages } from '../../utils/axios';
 import { useNavigate } from 'react-router-dom';
 import { FaPlus, FaUserCheck, FaChartBar } from 'react-icons/fa';
 import CreateModuleModal from './CreateModuleModal';
@@ -52,8 +52,7 @@ function InstructorPanel() {
     setInboxLoading(true);
     setInboxError('');
     try {
-      const response = await axiosInstance.get('/messages/my/');
-      setInbox(response.data);
+      setInbox(await fetchLatestMessages('/messages/my/'));
     } catch (err) {
       setInboxError('Failed to load messages');
     } finally {
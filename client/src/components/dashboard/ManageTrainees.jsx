@@ -1,6 +1,6 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../../contexts/AuthContext';
-import axiosInstance from '../../utils/axios';
+import axiosInstance, { fetchAllPages, fetchPage } from '../../utils/axios';
 
 function AssignModulesModal({ trainee, isOpen, onClose, allModules, assignedModuleIds, onSave }) {
   const [selectedModules, setSelectedModules] = useState([]);
@@ -24,11 +24,12 @@ function AssignModulesModal({ trainee, isOpen, onClose, allModules, assignedModu
     setLoading(true);
     setError('');
     try {
-      await Promise.all(
-        selectedModules.map(moduleId =>
-          axiosInstance.post(`/modules/${moduleId}/assign/`, { trainee_ids: [trainee.id] })
-        )
-      );
+      if (selectedModules.length > 0) {
+        await axiosInstance.post('/modules/assign/', {
+          trainee_ids: [trainee.id],
+          module_ids: selectedModules,
+        });
+      }
       onSave(selectedModules);
       onClose();
     } catch (err) {
@@ -189,6 +190,11 @@ function getAvatarColor(idx) {
   return cardColors[idx % cardColors.length];
 }
 
+// Trainees fetched per page, and the dashboard progress buckets the server filters by
+const TRAINEE_PAGE_SIZE = 24;
+const COMPLETION_BUCKETS = [0, 25, 50, 75, 100];
+const filterStyle = { padding: '0.5rem 1rem', borderRadius: 8, border: '1px solid #23272f', background: '#23272f', color: '#fff', fontSize: 15, marginRight: 8 };
+
 function ManageTrainees() {
   const { user } = useAuth();
   const [trainees, setTrainees] = useState([]);
@@ -204,17 +210,42 @@ function ManageTrainees() {
   const [showProgressModal, setShowProgressModal] = useState(false);
   const [traineeToView, setTraineeToView] = useState(null);
   const [search, setSearch] = useState('');
+  const [completion, setCompletion] = useState('');
+  const [moduleFilter, setModuleFilter] = useState('');
+  const [moduleStatus, setModuleStatus] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Only the latest request's page is shown when filters change quickly
+  const requestId = useRef(0);
 
   useEffect(() => {
-    fetchTrainees();
     fetchModules();
   }, []);
 
+  // Filtering happens on the server, one cursor page at a time; typing is debounced
+  useEffect(() => {
+    const timer = setTimeout(() => fetchTrainees(), 300);
+    return () => clearTimeout(timer);
+  }, [search, completion, moduleFilter, moduleStatus]);
+
+  const traineeFilters = () => ({
+    page_size: TRAINEE_PAGE_SIZE,
+    ...(search.trim() ? { q: search.trim() } : {}),
+    ...(completion !== '' ? { completion } : {}),
+    ...(moduleFilter ? { module: moduleFilter } : {}),
+    ...(moduleFilter && moduleStatus ? { module_status: moduleStatus } : {}),
+  });
+
   const fetchTrainees = async () => {
+    const current = ++requestId.current;
     try {
-      const response = await axiosInstance.get('/trainees/');
-      setTrainees(response.data);
+      const page = await fetchPage('/trainees/', traineeFilters());
+      if (current !== requestId.current) return;
+      setTrainees(page.results);
+      setNextCursor(page.nextCursor);
+      setError('');
     } catch (err) {
+      if (current !== requestId.current) return;
       setError('Failed to load trainees');
       console.error('Trainees error:', err);
     } finally {
@@ -222,10 +253,24 @@ function ManageTrainees() {
     }
   };
 
+  const loadMoreTrainees = async () => {
+    const current = requestId.current;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage('/trainees/', traineeFilters(), nextCursor);
+      if (current !== requestId.current) return;
+      setTrainees(prev => [...prev, ...page.results]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Trainees error:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchModules = async () => {
     try {
-      const response = await axiosInstance.get('/modules/');
-      setModules(response.data.results || response.data);
+      setModules(await fetchAllPages('/modules/'));
     } catch (err) {
       setError('Failed to load modules');
       console.error('Modules error:', err);
@@ -236,8 +281,7 @@ function ManageTrainees() {
     setSelectedTrainee(trainee);
     setShowAssignModal(true);
     try {
-      const response = await axiosInstance.get(`/assignments/?trainee_id=${trainee.id}`);
-      let assignments = response.data.results || response.data;
+      const assignments = await fetchAllPages('/assignments/', { trainee_id: trainee.id });
       setAssignedModuleIds(assignments.map(a => a.module.id));
     } catch (err) {
       setAssignedModuleIds([]);
@@ -278,13 +322,6 @@ function ManageTrainees() {
     setShowProgressModal(true);
   };
 
-  const filteredTrainees = trainees.filter(t =>
-    t.first_name.toLowerCase().includes(search.toLowerCase()) ||
-    t.last_name.toLowerCase().includes(search.toLowerCase()) ||
-    t.username.toLowerCase().includes(search.toLowerCase()) ||
-    t.email.toLowerCase().includes(search.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="loading-container">
@@ -330,11 +367,30 @@ function ManageTrainees() {
           <div style={{ display: 'flex', alignItems: 'center', gap: 10 }}>
             <input
               type="text"
-              placeholder="Search trainees..."
+              placeholder="Username or email..."
               value={search}
               onChange={e => setSearch(e.target.value)}
-              style={{ padding: '0.5rem 1rem', borderRadius: 8, border: '1px solid #23272f', background: '#23272f', color: '#fff', width: 180, fontSize: 15, marginRight: 8 }}
+              style={{ ...filterStyle, width: 180 }}
             />
+            <select value={completion} onChange={e => setCompletion(e.target.value)} style={filterStyle}>
+              <option value="">Any progress</option>
+              {COMPLETION_BUCKETS.map(bucket => (
+                <option key={bucket} value={bucket}>{bucket === 100 ? '100%' : `${bucket}-${bucket + 24}%`}</option>
+              ))}
+            </select>
+            <select value={moduleFilter} onChange={e => setModuleFilter(e.target.value)} style={{ ...filterStyle, maxWidth: 200 }}>
+              <option value="">Any module</option>
+              {modules.map(module => (
+                <option key={module.id} value={module.id}>{module.title}</option>
+              ))}
+            </select>
+            {moduleFilter && (
+              <select value={moduleStatus} onChange={e => setModuleStatus(e.target.value)} style={filterStyle}>
+                <option value="">Assigned</option>
+                <option value="completed">Completed</option>
+                <option value="pending">Pending</option>
+              </select>
+            )}
             <button className="btn btn-primary" style={{ fontWeight: 600, fontSize: 15, padding: '0.5rem 1.2rem', borderRadius: 8 }} onClick={handleAddTrainee}>+ Add Trainee</button>
           </div>
         </div>
@@ -343,7 +399,7 @@ function ManageTrainees() {
           {/* Section Title - left-aligned, flush with card and grid */}
           <h3 style={{ margin: '0 0 12px 0', fontWeight: 700, fontSize: '1.08rem', color: '#fff', textAlign: 'left' }}>Trainee List</h3>
           {/* Grid - fills card, cards start at left edge */}
-          {filteredTrainees.length === 0 ? (
+          {trainees.length === 0 ? (
             <div className="empty-state" style={{ textAlign: 'center', color: '#b0b8c1', marginTop: 40 }}>
               <div className="empty-state-icon" style={{ fontSize: 36, marginBottom: 8 }}>👥</div>
               <div className="empty-state-title" style={{ fontSize: 18, fontWeight: 700 }}>No Trainees Found</div>
@@ -351,7 +407,7 @@ function ManageTrainees() {
             </div>
           ) : (
             <div className="trainee-grid" style={gridStyle}>
-              {filteredTrainees.map((trainee, idx) => (
+              {trainees.map((trainee, idx) => (
                 <div
                   key={trainee.id}
                   style={{
@@ -408,6 +464,13 @@ function ManageTrainees() {
             ))}
           </div>
         )}
+          {nextCursor && (
+            <div style={{ display: 'flex', justifyContent: 'center', marginTop: 20 }}>
+              <button className="btn btn-secondary" style={{ fontWeight: 600, borderRadius: 8 }} onClick={loadMoreTrainees} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
       </div>
       </div>
       <AddTraineeModal isOpen={showAddModal} onClose={() => setShowAddModal(false)} onTraineeAdded={handleTraineeAdded} />
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
 import { useAuth } from '../../contexts/AuthContext';
-import axiosInstance from '../../utils/axios';
+import axiosInstance, { fetchAllPages } from '../../utils/axios';
 
 console.log('*** MANAGE TRAINING MODULES COMPONENT RENDERED ***');
 
@@ -44,15 +44,7 @@ function ManageTrainingModules() {
 
   const fetchModules = async () => {
     try {
-      const response = await axiosInstance.get('/modules/');
-      const modulesData = response.data.results || response.data;
-      if (Array.isArray(modulesData)) {
-          setModules(modulesData);
-      } else {
-          console.error("Received non-array data for modules:", response.data);
-          setModules([]);
-          setError('Received an unexpected data format for training modules.');
-      }
+      setModules(await fetchAllPages('/modules/'));
     } catch (err) {
       setError('Failed to load training modules');
       console.error('Modules error:', err);
@@ -65,9 +57,9 @@ function ManageTrainingModules() {
     try {
       console.log('Fetching trainees...');
       console.log('Current token:', localStorage.getItem('access_token'));
-      const response = await axiosInstance.get('/trainees/');
-      console.log('Trainees response:', response.data);
-      setTrainees(response.data);
+      const trainees = await fetchAllPages('/trainees/');
+      console.log('Trainees loaded:', trainees.length);
+      setTrainees(trainees);
     } catch (err) {
       console.error('Failed to load trainees:', err);
       console.error('Error response:', err.response);
@@ -169,22 +161,7 @@ function ManageTrainingModules() {
       // Fetch all trainees
       await fetchTrainees();
       // Fetch current assignments for this module
-      const response = await axiosInstance.get(`/assignments/?module_id=${module.id}`);
-      console.log('Assignments response:', response.data);
-      
-      // Handle paginated response
-      let assignments;
-      if (response.data && response.data.results) {
-        // Paginated response
-        assignments = response.data.results;
-      } else if (Array.isArray(response.data)) {
-        // Direct array response
-        assignments = response.data;
-      } else {
-        // Fallback
-        assignments = [];
-      }
-      
+      const assignments = await fetchAllPages('/assignments/', { module_id: module.id });
       console.log('Processed assignments:', assignments);
       const assignedTraineeIds = assignments.map(a => a.trainee.id);
       console.log('Assigned trainee IDs:', assignedTraineeIds);
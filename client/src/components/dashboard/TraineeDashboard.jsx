@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../../contexts/AuthContext';
-import axiosInstance from '../../utils/axios';
+import axiosInstance, { fetchLatestMessages } from '../../utils/axios';
 import { CircularProgressbarWithChildren, buildStyles } from 'react-circular-progressbar';
 import 'react-circular-progressbar/dist/styles.css';
 import { useNavigate } from 'react-router-dom';
@@ -55,10 +55,9 @@ function TraineeDashboard() {
     setInboxLoading(true);
     setInboxError('');
     try {
-      const response = await axiosInstance.get('/messages/my/');
+      const backendMsgs = await fetchLatestMessages('/messages/my/');
       setInbox(prev => {
         // Keep optimistic messages (id starts with 'temp') that are not in backend yet
-        const backendMsgs = response.data;
         const optimisticMsgs = prev.filter(m => m.id && String(m.id).startsWith('temp'));
         // Only keep optimistic messages not present in backend (by content and timestamp)
         const merged = [
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../../contexts/AuthContext';
-import axiosInstance from '../../utils/axios';
+import axiosInstance, { fetchAllPages } from '../../utils/axios';
 import { useNavigate } from 'react-router-dom';
 
 function TraineeModules() {
@@ -21,8 +21,7 @@ function TraineeModules() {
 
   const fetchModules = async () => {
     try {
-      const response = await axiosInstance.get('trainee/modules/');
-      setModules(response.data);
+      setModules(await fetchAllPages('trainee/modules/'));
     } catch (err) {
       setError('Failed to load modules');
       console.error('Modules error:', err);
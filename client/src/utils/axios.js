@@ -67,4 +67,35 @@ axiosInstance.interceptors.response.use(
     }
 );
 
+// Cursor-paginated list endpoints return { next, next_cursor, results }.
+// Follows next_cursor until the last page and returns every result.
+export const fetchAllPages = async (url, params = {}) => {
+    const results = [];
+    let cursor = null;
+    do {
+        const response = await axiosInstance.get(url, {
+            params: { page_size: 500, ...params, ...(cursor ? { cursor } : {}) }
+        });
+        results.push(...response.data.results);
+        cursor = response.data.next_cursor;
+    } while (cursor);
+    return results;
+};
+
+// Fetches one page of a cursor-paginated list endpoint; pass the previous
+// page's next_cursor to continue. Returns { results, nextCursor }.
+export const fetchPage = async (url, params = {}, cursor = null) => {
+    const response = await axiosInstance.get(url, {
+        params: { ...params, ...(cursor ? { cursor } : {}) }
+    });
+    return { results: response.data.results, nextCursor: response.data.next_cursor };
+};
+
+// Messages come newest first, one page at a time; returns the latest page
+// in chronological order for display in a chat
+export const fetchLatestMessages = async (url, pageSize = 200) => {
+    const response = await axiosInstance.get(url, { params: { page_size: pageSize } });
+    return [...response.data.results].reverse();
+};
+
 export default axiosInstance;
\ No newline at end of file
@@ -0,0 +1,11 @@
+# Loaded automatically by `gunicorn smart_db.wsgi` run from this directory.
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Threaded workers: a thread waiting on the password hashing pool, MongoDB or a
+# slow client doesn't stop the process serving other requests
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
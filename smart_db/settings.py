@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'training.tracing.MongoTracingMiddleware',
     # 'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -90,11 +91,37 @@ WSGI_APPLICATION = 'smart_db.wsgi.application'
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
 # Add MongoEngine connection
-from mongoengine import connect
+from django.core.exceptions import ImproperlyConfigured
+from pymongo import monitoring
 import os
 
+# Per-request command tracing (see training.tracing); must precede the first client
+from training.tracing import command_tracer
+monitoring.register(command_tracer)
+
 MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/SmartDB')
-connect(host=MONGODB_URI)
+
+# Client pool options; the connection itself is opened lazily in each worker (see training.mongo)
+MONGODB_CLIENT_OPTIONS = {
+    'maxPoolSize': int(os.environ.get('MONGODB_MAX_POOL_SIZE', 50)),
+    'minPoolSize': int(os.environ.get('MONGODB_MIN_POOL_SIZE', 0)),
+    'maxIdleTimeMS': int(os.environ.get('MONGODB_MAX_IDLE_TIME_MS', 60000)),
+    'serverSelectionTimeoutMS': int(os.environ.get('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+}
+# Wire compression, e.g. "zstd,zlib" (zstd and snappy need their Python packages installed)
+if os.environ.get('MONGODB_COMPRESSORS'):
+    MONGODB_CLIENT_OPTIONS['compressors'] = os.environ['MONGODB_COMPRESSORS']
+
+# Analytic reads (dashboards, exports) go to secondaries when the URI points at a
+# replica set; everything else reads from the primary (see training.routing)
+ANALYTICS_READ_PREFERENCE = os.environ.get('MONGODB_ANALYTICS_READ_PREFERENCE', 'secondaryPreferred')
+ANALYTICS_MAX_STALENESS_SECONDS = int(os.environ.get('MONGODB_ANALYTICS_MAX_STALENESS_SECONDS', 90))
+# MongoDB rejects smaller values, which would otherwise only fail on the first analytic read
+if ANALYTICS_MAX_STALENESS_SECONDS != -1 and ANALYTICS_MAX_STALENESS_SECONDS < 90:
+    raise ImproperlyConfigured('MONGODB_ANALYTICS_MAX_STALENESS_SECONDS must be at least 90, or -1 for no limit.')
+
+from training import mongo
+mongo.configure(MONGODB_URI, MONGODB_CLIENT_OPTIONS)
 
 DATABASES = {
     'default': {
@@ -106,18 +133,86 @@ DATABASES = {
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
-    # 'DEFAULT_AUTHENTICATION_CLASSES': (
-    #     'rest_framework_simplejwt.authentication.JWTAuthentication',
-    # ),
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'training.authentication.JWTAuthentication',
+    ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10,
+    # orjson by default; MessagePack for clients sending "Accept: application/msgpack"
+    'DEFAULT_RENDERER_CLASSES': (
+        'training.renderers.ORJSONRenderer',
+        'training.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'training.renderers.ORJSONParser',
+        'training.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'training.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
     'UNAUTHENTICATED_USER': None,
     'UNAUTHENTICATED_TOKEN': None,
 }
 
+# In-process cache of authenticated users (see training.user_cache)
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+
+# Password hashing pool (see training.hashing); PASSWORD_HASH_WORKERS=0 hashes inline.
+# PASSWORD_HASH_MAX_IN_FLIGHT is split evenly between PASSWORD_HASH_SERVER_PROCESSES
+# (by default gunicorn.conf.py's worker count); 0 disables the limit
+PASSWORD_HASH_ROUNDS = int(os.environ.get('PASSWORD_HASH_ROUNDS', 29000))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_MAX_IN_FLIGHT = int(os.environ.get('PASSWORD_HASH_MAX_IN_FLIGHT', 64))
+PASSWORD_HASH_SERVER_PROCESSES = int(os.environ.get(
+    'PASSWORD_HASH_SERVER_PROCESSES', os.environ.get('GUNICORN_WORKERS', os.cpu_count() * 2 + 1)
+))
+PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+# Modules assigned on self-registration (see training.onboarding); ONBOARDING_MODULE_IDS
+# is a comma-separated list of module ids, otherwise the first active modules are used
+ONBOARDING_MODULE_IDS = [pk for pk in os.environ.get('ONBOARDING_MODULE_IDS', '').split(',') if pk]
+ONBOARDING_MODULE_COUNT = int(os.environ.get('ONBOARDING_MODULE_COUNT', 6))
+ONBOARDING_COMPLETED_COUNT = int(os.environ.get('ONBOARDING_COMPLETED_COUNT', 3))
+
+# Background jobs (see training.jobs) and the cascade deletes they run. JOB_RUNNER=thread runs
+# jobs on JOB_THREADS threads in the web process; JOB_RUNNER=worker leaves them to manage.py run_jobs
+JOB_RUNNER = os.environ.get('JOB_RUNNER', 'thread')
+JOB_THREADS = int(os.environ.get('JOB_THREADS', 1))
+JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+# Finished jobs are kept this long for polling, then removed by a TTL index
+JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_SECONDS', 7 * 24 * 3600))
+# Bulk assignments above this many trainee/module pairs run as a job
+JOB_INLINE_ASSIGNMENTS = int(os.environ.get('JOB_INLINE_ASSIGNMENTS', 5000))
+CASCADE_BATCH_SIZE = int(os.environ.get('CASCADE_BATCH_SIZE', 1000))
+CASCADE_BATCH_PAUSE_MS = int(os.environ.get('CASCADE_BATCH_PAUSE_MS', 50))
+
+# Instructor dashboard snapshot (see training.snapshots): refreshed by a job every this many
+# seconds; changed rows are patched in on read until too many pile up
+DASHBOARD_SNAPSHOT_INTERVAL = int(os.environ.get('DASHBOARD_SNAPSHOT_INTERVAL', 300))
+DASHBOARD_SNAPSHOT_MAX_DIRTY = int(os.environ.get('DASHBOARD_SNAPSHOT_MAX_DIRTY', 1000))
+
+# Upper bound for ?page_size= on cursor-paginated list endpoints
+KEYSET_MAX_PAGE_SIZE = int(os.environ.get('KEYSET_MAX_PAGE_SIZE', 500))
+
+# Requests slower than this are logged with their Mongo command breakdown
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'training': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
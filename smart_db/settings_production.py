@@ -37,10 +37,8 @@ import os
 SECRET_KEY = os.environ.get('SECRET_KEY', SECRET_KEY)
 MONGODB_URI = os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/SmartDB')
 
-# Reconnect to MongoDB with production settings
-from mongoengine import disconnect, connect
-disconnect()
-connect(host=MONGODB_URI)
+# Re-register the MongoDB connection with production settings (still opened lazily)
+mongo.configure(MONGODB_URI, MONGODB_CLIENT_OPTIONS)
 
 # Static files configuration for PythonAnywhere
 STATIC_URL = '/static/'
@@ -0,0 +1,51 @@
+# Progress buckets used by the instructor dashboard (lower bound of each bucket)
+PROGRESS_BUCKETS = [0, 25, 50, 75, 100]
+
+
+def _counter(field):
+    return {'$ifNull': ['$' + field, 0]}
+
+
+# A trainee's completion percentage, rounded like the dashboard shows it
+COMPLETION_PERCENTAGE = {'$cond': [
+    {'$gt': [_counter('total_assigned'), 0]},
+    {'$round': [{'$multiply': [{'$divide': [_counter('completed'), _counter('total_assigned')]}, 100]}, 0]},
+    0,
+]}
+
+MODULE_STATS_FIELDS = ('title', 'assigned_count', 'completed_count')
+TRAINEE_STATS_QUERY = {'role': 'trainee', 'is_active': True}
+IN_PROGRESS_QUERY = {'is_completed': False, 'completed_at': {'$ne': None}}
+
+
+def module_stats_rows(modules):
+    stats = []
+    for module in modules:
+        assigned_count = module.get('assigned_count', 0)
+        completed_count = module.get('completed_count', 0)
+        completion_rate = (completed_count / assigned_count * 100) if assigned_count > 0 else 0
+        stats.append({
+            'id': str(module['_id']),
+            'title': module.get('title'),
+            'assigned_count': assigned_count,
+            'completed_count': completed_count,
+            'completion_rate': round(completion_rate, 2),
+        })
+    return stats
+
+
+def trainee_stats_rows(result):
+    result = result or {'trainees': [], 'distribution': []}
+    trainees = []
+    for row in result['trainees']:
+        trainees.append({
+            'id': str(row['_id']),
+            'username': row.get('username'),
+            'email': row.get('email'),
+            'created_at': row['created_at'].isoformat() if row.get('created_at') else None,
+            'completion_percentage': int(row['completion_percentage']),
+        })
+    distribution = {bucket: 0 for bucket in PROGRESS_BUCKETS}
+    for row in result['distribution']:
+        distribution[row['_id']] = row['count']
+    return trainees, distribution
@@ -2,4 +2,9 @@ from django.apps import AppConfig
 
 class TrainingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'training' 
\ No newline at end of file
+    name = 'training'
+
+    def ready(self):
+        from django.core.signals import request_started
+        from . import jobs
+        request_started.connect(jobs.start_on_request, dispatch_uid='training.jobs.start_on_request')
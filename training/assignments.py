@@ -0,0 +1,128 @@
+import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import BulkWriteError
+
+from . import counters
+from .models import User, TrainingModule, ModuleAssignment
+
+INSERT_BATCH_SIZE = 1000
+DUPLICATE_KEY = 11000
+
+
+def _object_ids(values):
+    valid, invalid = [], []
+    for value in values:
+        try:
+            valid.append(ObjectId(str(value)))
+        except (InvalidId, TypeError):
+            invalid.append(value)
+    return list(dict.fromkeys(valid)), invalid
+
+
+def _insert(collection, documents):
+    # Unordered insert; rows rejected by the unique (trainee, module) index were
+    # assigned concurrently and count as skipped
+    try:
+        collection.insert_many(documents, ordered=False)
+        return documents, []
+    except BulkWriteError as exc:
+        failed = {error['index'] for error in exc.details['writeErrors']}
+        non_duplicates = [error for error in exc.details['writeErrors'] if error['code'] != DUPLICATE_KEY]
+        if non_duplicates:
+            raise
+        inserted = [document for index, document in enumerate(documents) if index not in failed]
+        return inserted, [documents[index] for index in sorted(failed)]
+
+
+def _existing_ids(collection, documents):
+    # Ids of assignments another request inserted first
+    if not documents:
+        return []
+    pairs = [{'trainee': document['trainee'], 'module': document['module']} for document in documents]
+    return [row['_id'] for row in collection.find({'$or': pairs}, {'_id': 1})]
+
+
+def bulk_assign(trainee_ids, module_ids, assigned_by, report=None, with_ids=False):
+    """Assign every module to every trainee, skipping existing assignments.
+
+    Uses one query to validate trainees, one to validate modules, one to find
+    existing assignments and unordered batched inserts for the rest.
+    ``report(step, done, total)`` is called after each batch when given. With
+    ``with_ids`` the result also lists the ids of all the requested
+    assignments, new and existing, under ``assigned``.
+    """
+    trainee_oids, invalid_trainees = _object_ids(trainee_ids)
+    module_oids, invalid_modules = _object_ids(module_ids)
+
+    found_trainees = {
+        row['_id'] for row in
+        User._get_collection().find({'_id': {'$in': trainee_oids}, 'role': 'trainee'}, {'_id': 1})
+    }
+    found_modules = {
+        row['_id'] for row in
+        TrainingModule._get_collection().find({'_id': {'$in': module_oids}}, {'_id': 1})
+    }
+    missing_trainees = invalid_trainees + [oid for oid in trainee_oids if oid not in found_trainees]
+    missing_modules = invalid_modules + [oid for oid in module_oids if oid not in found_modules]
+    trainee_oids = [oid for oid in trainee_oids if oid in found_trainees]
+    module_oids = [oid for oid in module_oids if oid in found_modules]
+
+    collection = ModuleAssignment._get_collection()
+    existing = {
+        (row['trainee'], row['module']): row['_id'] for row in collection.find(
+            {'module': {'$in': module_oids}, 'trainee': {'$in': trainee_oids}},
+            {'_id': 1, 'trainee': 1, 'module': 1},
+        )
+    }
+    assigned = list(existing.values())
+
+    now = datetime.datetime.utcnow()
+    inserted_count = 0
+    skipped = len(existing)
+    total = len(module_oids) * len(trainee_oids)
+    batch = []
+    for module_oid in module_oids:
+        for trainee_oid in trainee_oids:
+            if (trainee_oid, module_oid) in existing:
+                continue
+            batch.append({
+                'trainee': trainee_oid,
+                'module': module_oid,
+                'assigned_by': assigned_by.pk,
+                'is_completed': False,
+                'assigned_at': now,
+            })
+            if len(batch) >= INSERT_BATCH_SIZE:
+                inserted, duplicates = _insert(collection, batch)
+                counters.apply((doc['trainee'], doc['module'], 1, 0) for doc in inserted)
+                inserted_count += len(inserted)
+                skipped += len(duplicates)
+                if with_ids:
+                    assigned += [doc['_id'] for doc in inserted] + _existing_ids(collection, duplicates)
+                batch = []
+                if report:
+                    report('assignments', inserted_count + skipped, total)
+    if batch:
+        inserted, duplicates = _insert(collection, batch)
+        counters.apply((doc['trainee'], doc['module'], 1, 0) for doc in inserted)
+        inserted_count += len(inserted)
+        skipped += len(duplicates)
+        if with_ids:
+            assigned += [doc['_id'] for doc in inserted] + _existing_ids(collection, duplicates)
+    if report:
+        report('assignments', inserted_count + skipped, total)
+
+    errors = [f'Trainee with ID {trainee_id} not found' for trainee_id in missing_trainees]
+    errors += [f'Module with ID {module_id} not found' for module_id in missing_modules]
+    result = {
+        'inserted': inserted_count,
+        'skipped': skipped,
+        'error_count': len(errors),
+        'errors': errors,
+        'modules_found': len(module_oids),
+    }
+    if with_ids:
+        result['assigned'] = [str(pk) for pk in assigned]
+    return result
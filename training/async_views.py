@@ -0,0 +1,208 @@
+"""Async versions of the read-heavy endpoints, for the ASGI app.
+
+They return the same payloads as their synchronous counterparts in
+``training.views`` but query Mongo through Motor, so a worker holds many slow
+clients on one event loop instead of a thread each, and independent queries of
+one request run concurrently.
+"""
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+
+from . import counters
+from . import fieldsets
+from . import renderers
+from . import snapshots
+from . import versioning
+from .authentication import JWTAuthentication
+from .models import User, TrainingModule, ModuleAssignment, Message, CollectionVersion
+from .mongo_async import collection
+from .pagination import KeysetPagination
+from .serializers import TrainingModuleSerializer, TraineeDashboardSerializer, broadcast_recipient
+from .user_cache import user_cache
+
+authenticator = JWTAuthentication()
+negotiator = DefaultContentNegotiation()
+# The sync views' renderers less the browsable API, so dates and ObjectIds render exactly the same
+RENDERERS = [renderers.ORJSONRenderer(), renderers.MessagePackRenderer()]
+
+
+def _negotiate(request):
+    # Picks the renderer like DRF does (Accept header or ?format=); versioning.etag_for
+    # reads accepted_media_type so JSON and MessagePack responses get different ETags
+    request.accepted_renderer, request.accepted_media_type = negotiator.select_renderer(Request(request), RENDERERS)
+
+
+def _render(request, data, status=status.HTTP_200_OK):
+    # Errors raised before or during negotiation fall back to JSON, as in DRF
+    renderer = getattr(request, 'accepted_renderer', RENDERERS[0])
+    body = renderer.render(data, getattr(request, 'accepted_media_type', renderer.media_type))
+    return HttpResponse(body, status=status, content_type=renderer.media_type)
+
+
+def _error(request, detail, status):
+    # Same body shape as DRF's exception handler
+    response = _render(request, detail if isinstance(detail, (list, dict)) else {'detail': detail}, status=status)
+    if status == 401:
+        response['WWW-Authenticate'] = authenticator.authenticate_header(None)
+    return response
+
+
+async def authenticate(request):
+    payload = authenticator.get_payload(request)
+    if payload is None:
+        return None
+    user = await user_cache.aget(payload.get('user_id'))
+    if user is None:
+        raise exceptions.AuthenticationFailed('User not found')
+    return user
+
+
+async def _stamp(request, scopes):
+    documents = await collection(CollectionVersion).find(versioning.version_query(scopes)).to_list(None)
+    return versioning.etag_for(request, scopes, documents)
+
+
+def async_api(*roles, scopes=None):
+    """Authenticate, check the role and answer conditional GETs for an async view.
+
+    ``scopes`` works like ``versioning.conditional_get``.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                _negotiate(request)
+            except exceptions.NotAcceptable as exc:
+                return _error(request, exc.detail, exc.status_code)
+            if request.method not in ('GET', 'HEAD'):
+                return _error(request, f'Method "{request.method}" not allowed.', status.HTTP_405_METHOD_NOT_ALLOWED)
+            try:
+                user = await authenticate(request)
+            except exceptions.AuthenticationFailed as exc:
+                return _error(request, exc.detail, status.HTTP_401_UNAUTHORIZED)
+            if user is None:
+                return _error(request, exceptions.NotAuthenticated.default_detail, status.HTTP_401_UNAUTHORIZED)
+            if roles and user.role not in roles:
+                return _error(request, exceptions.PermissionDenied.default_detail, status.HTTP_403_FORBIDDEN)
+            request.user = user
+
+            etag = last_modified = None
+            if scopes is not None:
+                etag, last_modified = await _stamp(request, scopes(request) if callable(scopes) else scopes)
+                if versioning.is_fresh(request, etag):
+                    return versioning.set_headers(
+                        HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified
+                    )
+            try:
+                response = await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return _error(request, exc.detail, exc.status_code)
+            if etag and response.status_code == status.HTTP_200_OK:
+                versioning.set_headers(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def _projection(selection):
+    return ['_id' if field == 'id' else field for field in fieldsets.projection(selection)]
+
+
+@async_api('instructor', scopes=[versioning.MODULES])
+async def module_list(request):
+    # KeysetPagination and fieldsets read query params through a DRF request
+    api_request = Request(request)
+    fields = fieldsets.select(api_request, TrainingModuleSerializer)
+    paginator = KeysetPagination()
+    query, sort, limit = paginator.prepare(api_request)
+    cursor = collection(TrainingModule).find(dict(query, is_active=True), _projection(fields))
+    rows = await cursor.sort(sort).limit(limit).to_list(None)
+    data = [
+        TrainingModuleSerializer(TrainingModule._from_son(row), fields=fields).data
+        for row in paginator.finish(rows)
+    ]
+    return _render(request, paginator.get_paginated_data(data))
+
+
+@async_api(scopes=lambda request: [
+    versioning.MODULES,
+    versioning.user_scope(request.user.pk),
+    versioning.assignments_scope(request.user.pk),
+])
+async def trainee_dashboard(request):
+    user = request.user
+    assignments, counts = await asyncio.gather(
+        collection(ModuleAssignment).find({'trainee': user.pk}).to_list(None),
+        collection(User).find_one({'_id': user.pk}, {'total_assigned': 1, 'completed': 1}),
+    )
+    module_ids = list({row['module'] for row in assignments if row.get('module')})
+    # Trainees read modules here, so content is included unless ?fields= narrows it
+    module_fields = fieldsets.select(Request(request), TrainingModuleSerializer, summary=False)
+    rows = await collection(TrainingModule).find({'_id': {'$in': module_ids}}, _projection(module_fields)).to_list(None)
+    modules = {row['_id']: TrainingModule._from_son(row) for row in rows}
+
+    assigned_modules = []
+    for assignment in assignments:
+        module = modules.get(assignment.get('module'))
+        assigned_modules.append({
+            'id': str(assignment['_id']),
+            'module': TrainingModuleSerializer(module, fields=module_fields).data if module else None,
+            'is_completed': assignment.get('is_completed', False),
+            'assigned_at': assignment.get('assigned_at'),
+            'completed_at': assignment.get('completed_at'),
+        })
+
+    dashboard_data = {
+        'user': user,
+        'progress': counters.progress_from_counts(counts),
+        'assigned_modules': assigned_modules,
+    }
+    return _render(request, TraineeDashboardSerializer(dashboard_data).data)
+
+
+@async_api('instructor')
+async def instructor_dashboard_view(request):
+    # The same snapshot as the sync view; its reads and patching run on a worker thread
+    page_size = KeysetPagination().get_page_size(Request(request))
+    return _render(request, await sync_to_async(snapshots.dashboard)(page_size))
+
+
+def _user_summary(user):
+    return {'id': str(user['_id']), 'username': user.get('username'), 'role': user.get('role')}
+
+
+@async_api()
+async def trainee_messages(request):
+    user = request.user
+    paginator = KeysetPagination(ordering=('-timestamp', '-_id'))
+    query, sort, limit = paginator.prepare(Request(request))
+    match = {'$or': [{'sender': user.pk}, {'recipient': user.pk}, {'recipients': user.pk}]}
+    if query:
+        match = {'$and': [match, query]}
+    page = paginator.finish(await collection(Message).find(match).sort(sort).limit(limit).to_list(None))
+
+    users = {user.pk: {'id': str(user.pk), 'username': user.username, 'role': user.role}}
+    user_ids = {row.get(field) for row in page for field in ('sender', 'recipient')} - {None, user.pk}
+    if user_ids:
+        rows = await collection(User).find({'_id': {'$in': list(user_ids)}}, {'username': 1, 'role': 1}).to_list(None)
+        users.update((row['_id'], _user_summary(row)) for row in rows)
+
+    data = []
+    for msg in page:
+        recipient = users.get(msg.get('recipient'))
+        if recipient is None and msg.get('recipients'):
+            recipient = broadcast_recipient(msg['recipients'], msg.get('sender'), user.pk, users[user.pk])
+        data.append({
+            'id': str(msg['_id']),
+            'sender': users.get(msg.get('sender')),
+            'recipient': recipient,
+            'content': msg.get('content'),
+            'timestamp': msg['timestamp'].isoformat() if msg.get('timestamp') else None,
+        })
+    return _render(request, paginator.get_paginated_data(data))
@@ -0,0 +1,43 @@
+import jwt
+from django.conf import settings
+from rest_framework import authentication, exceptions
+
+from .user_cache import user_cache
+
+
+class JWTAuthentication(authentication.BaseAuthentication):
+    """Authenticate ``Authorization: Bearer <token>`` headers issued by ``generate_jwt``.
+
+    The token is decoded once per request and the user is resolved through the
+    in-process user cache, so ``request.user`` is available to permissions and
+    views without another Mongo round trip.
+    """
+    keyword = 'Bearer'
+
+    def get_payload(self, request):
+        """Return the decoded token payload, or None when no bearer token was sent."""
+        auth_header = authentication.get_authorization_header(request).split()
+        if not auth_header or auth_header[0].decode('latin-1') != self.keyword:
+            return None
+        if len(auth_header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token')
+
+        try:
+            payload = jwt.decode(auth_header[1], settings.SECRET_KEY, algorithms=['HS256'])
+        except jwt.ExpiredSignatureError:
+            raise exceptions.AuthenticationFailed('Token expired')
+        except jwt.InvalidTokenError:
+            raise exceptions.AuthenticationFailed('Invalid token')
+        return payload
+
+    def authenticate(self, request):
+        payload = self.get_payload(request)
+        if payload is None:
+            return None
+        user = user_cache.get(payload.get('user_id'))
+        if user is None:
+            raise exceptions.AuthenticationFailed('User not found')
+        return (user, payload)
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,31 @@
+import threading
+from collections import Counter
+
+from pymongo import monitoring
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts Mongo commands by name while enabled.
+
+    Register it with ``pymongo.monitoring.register`` before the client is
+    created; it only sees clients created afterwards.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands = Counter()
+
+    def reset(self):
+        with self._lock:
+            counts, self.commands = self.commands, Counter()
+        return counts
+
+    def started(self, event):
+        with self._lock:
+            self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
@@ -0,0 +1,87 @@
+import time
+
+from bson import ObjectId
+from django.conf import settings
+
+from . import counters, jobs
+from .models import ModuleAssignment, Message
+
+DELETE_USER_DEPENDENTS = 'delete_user_dependents'
+DELETE_MODULE_DEPENDENTS = 'delete_module_dependents'
+
+
+def _in_batches(collection, query, step, report, apply, projection=None):
+    """Run ``apply(rows)`` on bounded batches of documents matching ``query``.
+
+    ``apply`` must stop the rows from matching ``query`` (delete or update
+    them), or this never ends. Sleeps ``CASCADE_BATCH_PAUSE_MS`` between
+    batches so replication and other writers keep up.
+    """
+    total = collection.count_documents(query)
+    done = 0
+    report(step, done, total)
+    while True:
+        rows = list(collection.find(query, projection or {'_id': 1}, limit=settings.CASCADE_BATCH_SIZE))
+        if not rows:
+            break
+        apply(rows)
+        done += len(rows)
+        report(step, done, total)
+        time.sleep(settings.CASCADE_BATCH_PAUSE_MS / 1000)
+    return done
+
+
+def _delete(collection, rows):
+    collection.delete_many({'_id': {'$in': [row['_id'] for row in rows]}})
+
+
+def _remove_assignments(query, step, report, changes):
+    # changes(row) -> counter change tuple for a removed assignment
+    collection = ModuleAssignment._get_collection()
+
+    def apply(rows):
+        _delete(collection, rows)
+        counters.apply(changes(row) for row in rows)
+    return _in_batches(collection, query, step, report, apply,
+                       {'trainee': 1, 'module': 1, 'is_completed': 1})
+
+
+@jobs.handler(DELETE_USER_DEPENDENTS)
+def delete_user_dependents(params, report):
+    """Remove a deleted user's assignments and messages, and drop them from broadcasts."""
+    user_id = ObjectId(params['user_id'])
+    messages = Message._get_collection()
+    assignments = _remove_assignments(
+        {'trainee': user_id}, 'assignments', report,
+        lambda row: (None, row['module'], -1, -int(bool(row.get('is_completed')))),
+    )
+    deleted_messages = _in_batches(
+        messages, {'$or': [{'sender': user_id}, {'recipient': user_id}]}, 'messages', report,
+        lambda rows: _delete(messages, rows),
+    )
+    broadcasts = _in_batches(
+        messages, {'recipients': user_id}, 'broadcasts', report,
+        lambda rows: messages.update_many(
+            {'_id': {'$in': [row['_id'] for row in rows]}}, {'$pull': {'recipients': user_id}}
+        ),
+    )
+    return {'assignments': assignments, 'messages': deleted_messages, 'broadcasts': broadcasts}
+
+
+@jobs.handler(DELETE_MODULE_DEPENDENTS)
+def delete_module_dependents(params, report):
+    """Remove a deleted module's assignments and update the trainees' counters."""
+    module_id = ObjectId(params['module_id'])
+    assignments = _remove_assignments(
+        {'module': module_id}, 'assignments', report,
+        lambda row: (row['trainee'], None, -1, -int(bool(row.get('is_completed')))),
+    )
+    return {'assignments': assignments}
+
+
+def user_deleted(user, requested_by=None):
+    return jobs.enqueue(DELETE_USER_DEPENDENTS, {'user_id': str(user.pk)}, requested_by)
+
+
+def module_deleted(module, requested_by=None):
+    return jobs.enqueue(DELETE_MODULE_DEPENDENTS, {'module_id': str(module.pk)}, requested_by)
@@ -0,0 +1,87 @@
+from collections import Counter, defaultdict
+
+from bson import DBRef
+from pymongo import UpdateMany
+
+from .models import User, TrainingModule
+from . import snapshots, versioning
+
+
+def _inc_many(document_cls, deltas):
+    # Group documents that receive the same increments so each distinct
+    # delta becomes a single UpdateMany, all sent in one bulk_write.
+    groups = defaultdict(list)
+    for doc_id, fields in deltas.items():
+        inc = tuple(sorted((name, value) for name, value in fields.items() if value))
+        if inc:
+            groups[inc].append(doc_id)
+    if not groups:
+        return
+    operations = [
+        UpdateMany({'_id': {'$in': ids}}, {'$inc': dict(inc)})
+        for inc, ids in groups.items()
+    ]
+    document_cls._get_collection().bulk_write(operations, ordered=False)
+
+
+def _pk(value):
+    if isinstance(value, DBRef):
+        return value.id
+    return getattr(value, 'pk', value)
+
+
+def apply(changes, dirty_trainees=()):
+    """Apply (trainee, module, assigned_delta, completed_delta) tuples to the progress counters.
+
+    ``dirty_trainees`` are marked on the dashboard snapshot with the changed
+    rows, for callers that set a trainee's counters themselves.
+    """
+    users = defaultdict(Counter)
+    modules = defaultdict(Counter)
+    for trainee, module, assigned, completed in changes:
+        if trainee is not None:
+            users[_pk(trainee)].update(total_assigned=assigned, completed=completed)
+        if module is not None:
+            modules[_pk(module)].update(assigned_count=assigned, completed_count=completed)
+    _inc_many(User, users)
+    _inc_many(TrainingModule, modules)
+    versioning.bump(*(versioning.assignments_scope(trainee_id) for trainee_id in users))
+    snapshots.mark(list(users) + [pk for pk in dirty_trainees if pk not in users], list(modules))
+
+
+def assignment_added(trainee, module, is_completed=False):
+    apply([(trainee, module, 1, int(is_completed))])
+
+
+def assignment_completed(trainee, module):
+    apply([(trainee, module, 0, 1)])
+
+
+def assignment_removed(trainee, module, is_completed=False):
+    apply([(trainee, module, -1, -int(is_completed))])
+
+
+def trainee_progress(user):
+    return _progress(user.total_assigned or 0, user.completed or 0)
+
+
+def load_trainee_progress(user):
+    # The counters move on every assignment write, so read them fresh instead of
+    # trusting a cached user document
+    counts = User.objects(id=user.pk).only('total_assigned', 'completed').as_pymongo().first()
+    return progress_from_counts(counts)
+
+
+def progress_from_counts(counts):
+    counts = counts or {}
+    return _progress(counts.get('total_assigned') or 0, counts.get('completed') or 0)
+
+
+def _progress(total_assigned, completed):
+    completion_percentage = (completed / total_assigned * 100) if total_assigned > 0 else 0
+    return {
+        'total_assigned': total_assigned,
+        'completed': completed,
+        'pending': total_assigned - completed,
+        'completion_percentage': round(completion_percentage, 2),
+    }
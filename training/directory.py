@@ -0,0 +1,72 @@
+"""Server-side filters for the instructor's trainee directory.
+
+Every filter narrows an ``_id``-ordered walk over active trainees, so results
+page with ``KeysetPagination`` like the unfiltered list.
+"""
+from .aggregations import COMPLETION_PERCENTAGE, PROGRESS_BUCKETS, TRAINEE_STATS_QUERY
+from .models import CASE_INSENSITIVE, ModuleAssignment, User
+
+# Assignments read per round trip when walking one module's trainees
+MODULE_BATCH_SIZE = 500
+
+
+def prefix_filter(prefix):
+    # Under CASE_INSENSITIVE this is a range scan on the collated username/email
+    # indexes; U+FFFF collates after every other character
+    bounds = {'$gte': prefix, '$lt': prefix + '\uffff'}
+    return {'$or': [{'username': bounds}, {'email': bounds}]}
+
+
+def completion_filter(bucket):
+    """Trainees in one of the dashboard's ``PROGRESS_BUCKETS``, e.g. 25 for 25-49%."""
+    index = PROGRESS_BUCKETS.index(bucket)
+    upper = PROGRESS_BUCKETS[index + 1] if index + 1 < len(PROGRESS_BUCKETS) else 101
+    return {'$expr': {'$and': [
+        {'$gte': [COMPLETION_PERCENTAGE, bucket]},
+        {'$lt': [COMPLETION_PERCENTAGE, upper]},
+    ]}}
+
+
+def _find(query, limit, projection, collation):
+    cursor = User._get_collection().find(query, projection, collation=collation)
+    return list(cursor.sort('_id', 1).limit(limit))
+
+
+def _assigned(query, after, limit, projection, collation, module_id, completed):
+    # Walk the module's assignments in trainee order and keep the trainees that
+    # pass the other filters, so a popular module never loads every trainee id
+    match = {'module': module_id, 'is_completed': {'$in': [False, True]} if completed is None else completed}
+    last = after.get('_id', {}).get('$gt')
+    rows = []
+    while len(rows) < limit:
+        batch = dict(match, trainee={'$gt': last}) if last is not None else match
+        trainee_ids = [
+            row['trainee'] for row in ModuleAssignment._get_collection()
+            .find(batch, {'trainee': 1, '_id': 0}).sort('trainee', 1).limit(MODULE_BATCH_SIZE)
+        ]
+        if not trainee_ids:
+            break
+        rows += _find(dict(query, _id={'$in': trainee_ids}), limit - len(rows), projection, collation)
+        if len(trainee_ids) < MODULE_BATCH_SIZE:
+            break
+        last = trainee_ids[-1]
+    return rows
+
+
+def trainees(after, limit, projection, prefix=None, completion=None, module_id=None, completed=None):
+    """Up to ``limit`` raw trainee documents in ``_id`` order after the keyset filter ``after``.
+
+    ``prefix`` matches the start of the username or email, ignoring case;
+    ``completion`` is a progress bucket; ``module_id`` keeps trainees assigned
+    that module, further narrowed by ``completed`` when it is not None.
+    """
+    query = dict(TRAINEE_STATS_QUERY)
+    collation = None
+    if prefix:
+        query.update(prefix_filter(prefix))
+        collation = CASE_INSENSITIVE
+    if completion is not None:
+        query.update(completion_filter(completion))
+    if module_id is not None:
+        return _assigned(query, after, limit, projection, collation, module_id, completed)
+    return _find(dict(query, **after), limit, projection, collation)
@@ -0,0 +1,120 @@
+import csv
+import json
+
+from .models import User, TrainingModule, ModuleAssignment
+from .routing import ANALYTIC, collection
+
+BATCH_SIZE = 5000
+# Rows are grouped into chunks of roughly this many bytes before being yielded
+CHUNK_SIZE = 64 * 1024
+
+ASSIGNMENT_FIELDS = [
+    'id', 'trainee_id', 'trainee_username', 'module_id', 'module_title',
+    'is_completed', 'assigned_at', 'completed_at',
+]
+PROGRESS_FIELDS = [
+    'trainee_id', 'username', 'email', 'total_assigned', 'completed', 'completion_percentage',
+]
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _name_map(document_cls, field):
+    # Only _id and the display field are loaded, so the map stays small next to the row stream
+    cursor = collection(document_cls, ANALYTIC).find({}, {field: 1}, batch_size=BATCH_SIZE)
+    return {row['_id']: row.get(field) for row in cursor}
+
+
+def assignment_rows(query=None, batch_size=BATCH_SIZE):
+    usernames = _name_map(User, 'username')
+    titles = _name_map(TrainingModule, 'title')
+    cursor = collection(ModuleAssignment, ANALYTIC).find(
+        query or {},
+        {'trainee': 1, 'module': 1, 'is_completed': 1, 'assigned_at': 1, 'completed_at': 1},
+        batch_size=batch_size,
+    )
+    for doc in cursor:
+        trainee_id = doc.get('trainee')
+        module_id = doc.get('module')
+        yield {
+            'id': str(doc['_id']),
+            'trainee_id': str(trainee_id) if trainee_id else None,
+            'trainee_username': usernames.get(trainee_id),
+            'module_id': str(module_id) if module_id else None,
+            'module_title': titles.get(module_id),
+            'is_completed': bool(doc.get('is_completed')),
+            'assigned_at': _isoformat(doc.get('assigned_at')),
+            'completed_at': _isoformat(doc.get('completed_at')),
+        }
+
+
+def progress_rows(query=None, batch_size=BATCH_SIZE):
+    cursor = collection(User, ANALYTIC).find(
+        dict(query or {}, role='trainee'),
+        {'username': 1, 'email': 1, 'total_assigned': 1, 'completed': 1},
+        batch_size=batch_size,
+    )
+    for doc in cursor:
+        total_assigned = doc.get('total_assigned') or 0
+        completed = doc.get('completed') or 0
+        yield {
+            'trainee_id': str(doc['_id']),
+            'username': doc.get('username'),
+            'email': doc.get('email'),
+            'total_assigned': total_assigned,
+            'completed': completed,
+            'completion_percentage': round(completed / total_assigned * 100, 2) if total_assigned else 0,
+        }
+
+
+DATASETS = {
+    'assignments': (assignment_rows, ASSIGNMENT_FIELDS),
+    'progress': (progress_rows, PROGRESS_FIELDS),
+}
+
+
+class _Echo:
+    # File-like object whose write() hands the formatted line back to csv.writer's caller
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows, fields):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
+
+
+def chunked(lines, size=CHUNK_SIZE):
+    buffer = []
+    buffered = 0
+    for line in lines:
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def export(dataset, fmt, query=None):
+    """Return (chunk iterator, content type) for a dataset in the given format."""
+    rows, fields = DATASETS[dataset]
+    encode, content_type = FORMATS[fmt]
+    return chunked(encode(rows(query), fields)), content_type
@@ -0,0 +1,74 @@
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _tree(value):
+    # 'id,module.title' -> {'id': {}, 'module': {'title': {}}}
+    tree = {}
+    for path in filter(None, (part.strip() for part in (value or '').split(','))):
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def resolve(serializer_cls, requested=None, excluded=None, summary=True, default=None):
+    """Return the selection for a serializer as ``{field: nested selection or None}``.
+
+    ``requested`` and ``excluded`` are trees as built from ``?fields=`` and
+    ``?exclude=``. Without a request the serializer's ``summary_fields`` (or
+    ``default``, for nested serializers) are used when ``summary`` is set and
+    every field otherwise. ``id`` is always kept.
+    """
+    requested = requested or {}
+    excluded = excluded or {}
+    available = list(serializer_cls._declared_fields)
+    unknown = (set(requested) | set(excluded)) - set(available)
+    if unknown:
+        raise ValidationError({FIELDS_PARAM: [f'Unknown field: {name}' for name in sorted(unknown)]})
+
+    if requested:
+        wanted = set(requested)
+    elif summary and (default or serializer_cls.summary_fields):
+        wanted = set(default or serializer_cls.summary_fields)
+    else:
+        wanted = set(available)
+
+    selection = {}
+    for name in available:
+        if name != 'id' and (name not in wanted or excluded.get(name) == {}):
+            continue
+        nested = serializer_cls.nested_serializers.get(name)
+        if nested:
+            nested_cls, nested_default = nested
+            selection[name] = resolve(
+                nested_cls, requested.get(name), excluded.get(name), summary, nested_default if summary else None
+            )
+        else:
+            selection[name] = None
+    return selection
+
+
+def select(request, serializer_cls, summary=True):
+    """Selection for ``serializer_cls`` from the request's ``?fields=`` / ``?exclude=``."""
+    return resolve(
+        serializer_cls,
+        _tree(request.query_params.get(FIELDS_PARAM)),
+        _tree(request.query_params.get(EXCLUDE_PARAM)),
+        summary,
+    )
+
+
+def projection(selection):
+    """Document fields to load for a selection, for ``QuerySet.only()``."""
+    return ['id'] + [name for name in selection if name != 'id']
+
+
+def related_projections(serializer_cls, selection):
+    # Projections for the selected reference fields, keyed by field name
+    return {
+        name: projection(selection[name])
+        for name in serializer_cls.nested_serializers if name in selection
+    }
@@ -0,0 +1,110 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from django.conf import settings
+from passlib.hash import pbkdf2_sha256
+from rest_framework import exceptions, status
+
+
+class HashingBusy(exceptions.APIException):
+    # Raised instead of queueing once this process's hashing slots are taken
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many concurrent sign-ins, please retry shortly.'
+    default_code = 'hashing_busy'
+    # Picked up by DRF's exception handler as a Retry-After header
+    wait = 1
+
+
+def _hasher(rounds):
+    return pbkdf2_sha256.using(rounds=rounds)
+
+
+def _hash(password, rounds):
+    return _hasher(rounds).hash(password)
+
+
+def _verify(password, hashed, rounds):
+    # Runs in a pool process; returns (valid, replacement hash or None)
+    hasher = _hasher(rounds)
+    if not pbkdf2_sha256.verify(password, hashed):
+        return False, None
+    if hasher.needs_update(hashed):
+        return True, hasher.hash(password)
+    return True, None
+
+
+class HashingPool:
+    """Runs password hashing in worker processes.
+
+    ``max_in_flight`` hashes are shared out between the ``processes`` web
+    processes, each holding its share in a semaphore; calls beyond that fail
+    fast with ``HashingBusy`` rather than piling up behind a login burst. The
+    calling thread waits for its result, so serve with threaded workers (see
+    gunicorn.conf.py). With ``workers=0`` hashing runs inline in the caller,
+    and ``max_in_flight=0`` disables the limit.
+    """
+
+    def __init__(self, workers=2, max_in_flight=64, processes=1, rounds=29000, timeout=10):
+        self.workers = workers
+        self.rounds = rounds
+        self.timeout = timeout
+        # Checked without blocking, so no Mongo round trip or wait is added per hash
+        self._slots = None
+        if max_in_flight:
+            self._slots = threading.BoundedSemaphore(math.ceil(max_in_flight / max(processes, 1)))
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        # Created lazily and per process, so pre-forked servers don't share a pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            if not self.workers:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingBusy()
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def verify(self, password, hashed):
+        """Return (valid, new_hash); new_hash is set when ``hashed`` uses outdated parameters."""
+        try:
+            return self._run(_verify, password, hashed, self.rounds)
+        except ValueError:
+            # Not a pbkdf2_sha256 hash
+            return False, None
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+
+
+password_hasher = HashingPool(
+    workers=getattr(settings, 'PASSWORD_HASH_WORKERS', 2),
+    max_in_flight=getattr(settings, 'PASSWORD_HASH_MAX_IN_FLIGHT', 64),
+    processes=getattr(settings, 'PASSWORD_HASH_SERVER_PROCESSES', 1),
+    rounds=getattr(settings, 'PASSWORD_HASH_ROUNDS', 29000),
+    timeout=getattr(settings, 'PASSWORD_HASH_TIMEOUT', 10),
+)
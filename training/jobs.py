@@ -0,0 +1,270 @@
+import concurrent.futures
+import datetime
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from pymongo import ReturnDocument
+
+from .models import Job
+
+logger = logging.getLogger('training.jobs')
+
+# Modules whose @handler functions are loaded before a job runs
+HANDLER_MODULES = ('training.cascade', 'training.tasks', 'training.snapshots')
+
+# kind -> function(params, report) returning a result dict
+HANDLERS = {}
+# Functions called on every monitor and run_jobs check, registered with @periodic
+PERIODIC = []
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+# Jobs running on this process's job threads, heartbeated by check()
+_running = set()
+_running_lock = threading.Lock()
+# Whether a _run_queued pass is waiting or running on this process's job threads
+_sweeping = False
+_monitor_pid = None
+_monitor_lock = threading.Lock()
+
+
+def handler(kind):
+    def register(function):
+        HANDLERS[kind] = function
+        return function
+    return register
+
+
+def periodic(function):
+    PERIODIC.append(function)
+    return function
+
+
+def _load_handlers():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def get_handler(kind):
+    if kind not in HANDLERS:
+        _load_handlers()
+    return HANDLERS[kind]
+
+
+def run_periodic():
+    """Call the @periodic functions, e.g. to queue the scheduled dashboard refresh."""
+    _load_handlers()
+    for function in PERIODIC:
+        try:
+            function()
+        except Exception:
+            logger.exception('Periodic task %s failed', function.__name__)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _get_executor():
+    # One small thread pool per process, created after any fork
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=settings.JOB_THREADS, thread_name_prefix='job'
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def enqueue(kind, params, user=None):
+    """Persist a job and, unless ``JOB_RUNNER`` is ``worker``, start it on this process's job threads.
+
+    With ``JOB_RUNNER=worker`` the job waits for ``manage.py run_jobs``.
+    """
+    job = Job(kind=kind, params=params, created_by=getattr(user, 'pk', None))
+    job.save()
+    if settings.JOB_RUNNER != 'worker':
+        start()
+        _get_executor().submit(run, job.pk)
+    return job
+
+
+def start():
+    """Start this process's job monitor thread, once per process, for ``JOB_RUNNER=thread``.
+
+    Every ``JOB_STALE_SECONDS / 3`` it runs ``check``. ``run_jobs`` does the
+    same for ``JOB_RUNNER=worker``.
+    """
+    global _monitor_pid
+    if _monitor_pid == os.getpid():
+        return
+    with _monitor_lock:
+        if _monitor_pid == os.getpid():
+            return
+        _monitor_pid = os.getpid()
+    threading.Thread(target=_monitor, name='job-monitor', daemon=True).start()
+
+
+def start_on_request(sender, **kwargs):
+    # request_started receiver: the first request a web process serves starts its monitor
+    if settings.JOB_RUNNER != 'worker':
+        start()
+
+
+def _monitor():
+    while True:
+        try:
+            check()
+        except Exception:
+            logger.exception('Job monitor check failed')
+        time.sleep(settings.JOB_STALE_SECONDS / 3)
+
+
+def orphaned_query():
+    """Queued jobs nobody has claimed for ``JOB_STALE_SECONDS``.
+
+    These are re-queued jobs and jobs whose enqueuing process died before its
+    thread got to them; any runner may take them.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.JOB_STALE_SECONDS)
+    return {'created_at': {'$lt': cutoff}}
+
+
+def check():
+    """One monitor pass: heartbeats, stalled and orphaned jobs, then the periodic tasks.
+
+    Heartbeats this process's running jobs, re-queues stalled ones, calls the
+    ``@periodic`` functions and runs orphaned queued jobs on this process.
+    """
+    global _sweeping
+    with _running_lock:
+        running = list(_running)
+    heartbeat(running)
+    requeue_stale()
+    run_periodic()
+    with _running_lock:
+        if _sweeping:
+            return
+        if Job._get_collection().find_one(dict(orphaned_query(), status='queued'), {'_id': 1}) is None:
+            return
+        _sweeping = True
+    try:
+        _get_executor().submit(_run_queued)
+    except Exception:
+        with _running_lock:
+            _sweeping = False
+        raise
+
+
+def _run_queued():
+    # Runs orphaned jobs until none are left; each is claimed, so no other runner also runs it
+    global _sweeping
+    try:
+        while True:
+            job = claim(orphaned_query())
+            if job is None:
+                return
+            _execute_tracked(job['_id'])
+    finally:
+        with _running_lock:
+            _sweeping = False
+
+
+def claim(query=None):
+    """Mark the oldest queued job matching ``query`` as running and return it, or None."""
+    now = datetime.datetime.utcnow()
+    return Job._get_collection().find_one_and_update(
+        dict(query or {}, status='queued'),
+        {'$set': {'status': 'running', 'started_at': now, 'heartbeat_at': now, 'worker': worker_name()},
+         '$inc': {'attempts': 1}},
+        sort=[('created_at', 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def heartbeat(job_ids):
+    if job_ids:
+        Job._get_collection().update_many(
+            {'_id': {'$in': list(job_ids)}, 'status': 'running'},
+            {'$set': {'heartbeat_at': datetime.datetime.utcnow()}},
+        )
+
+
+def requeue_stale():
+    """Re-queue running jobs whose runner stopped heartbeating; give up after ``JOB_MAX_ATTEMPTS``."""
+    collection = Job._get_collection()
+    now = datetime.datetime.utcnow()
+    stale = {'status': 'running', 'heartbeat_at': {'$lt': now - datetime.timedelta(seconds=settings.JOB_STALE_SECONDS)}}
+    collection.update_many(
+        dict(stale, attempts={'$gte': settings.JOB_MAX_ATTEMPTS}),
+        {'$set': {'status': 'failed', 'error': 'Runner stopped responding.', 'finished_at': now}},
+    )
+    return collection.update_many(stale, {'$set': {'status': 'queued'}}).modified_count
+
+
+def reporter(job_id):
+    """Return ``report(step, done, total=None)``, which records progress on the job."""
+    collection = Job._get_collection()
+
+    def report(step, done, total=None):
+        progress = {'done': done}
+        if total is not None:
+            progress['total'] = total
+        collection.update_one(
+            {'_id': job_id},
+            {'$set': {f'progress.{step}': progress, 'heartbeat_at': datetime.datetime.utcnow()}},
+        )
+    return report
+
+
+def execute(job_id):
+    """Run a claimed job and record its result or error."""
+    collection = Job._get_collection()
+    job = collection.find_one({'_id': job_id})
+    try:
+        result = get_handler(job['kind'])(job.get('params') or {}, reporter(job_id))
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed', job_id, job['kind'])
+        update = {'status': 'failed', 'error': str(exc)}
+    else:
+        update = {'status': 'succeeded', 'result': result or {}}
+    update['finished_at'] = datetime.datetime.utcnow()
+    collection.update_one({'_id': job_id}, {'$set': update})
+
+
+def _execute_tracked(job_id):
+    with _running_lock:
+        _running.add(job_id)
+    try:
+        execute(job_id)
+    finally:
+        with _running_lock:
+            _running.discard(job_id)
+
+
+def run(job_id):
+    # Claim first so the job runs exactly once even if a worker also picks it up
+    if claim({'_id': job_id}) is not None:
+        _execute_tracked(job_id)
+
+
+def serialize(job):
+    return {
+        'id': str(job.pk),
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'result': job.result,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,320 @@
+import argparse
+import collections
+import io
+import itertools
+import json
+import math
+import os
+import time
+from urllib.parse import urlsplit
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from mongoengine.connection import get_db
+from pymongo import monitoring
+
+from training import mongo, sampledata, urls
+from training.bench import CommandCounter
+from training.tracing import percentile
+from training.models import User, TrainingModule, ModuleAssignment, Message, Job
+from training.user_cache import user_cache
+from training.views import generate_jwt
+
+DEFAULT_BUDGETS = os.path.join(os.path.dirname(urls.__file__), 'bench_budgets.json')
+
+Endpoint = collections.namedtuple('Endpoint', 'name method role url data')
+
+
+class BenchContext:
+    """Seeded ids plus helpers that create fresh objects for destructive endpoints."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.sequence = itertools.count()
+        self.instructor = str(ids['instructors'][0])
+        self.trainee = str(ids['trainees'][0])
+        self.module = str(ids['modules'][0])
+        assignment = ModuleAssignment._get_collection().find_one({'trainee': ids['trainees'][0]}, {'_id': 1})
+        self.assignment = str(assignment['_id']) if assignment else str(ObjectId())
+        message = Message._get_collection().find_one({'recipients': ids['instructors'][0]}, {'_id': 1})
+        self.message = str(message['_id']) if message else str(ObjectId())
+
+    def unique(self, prefix):
+        return f'{prefix}{next(self.sequence)}'
+
+    def fresh_user(self, role='trainee'):
+        name = self.unique(f'bench{role}')
+        return str(User._get_collection().insert_one({
+            'username': name, 'email': f'{name}@example.com', 'password': 'x',
+            'role': role, 'is_active': True, 'total_assigned': 0, 'completed': 0,
+        }).inserted_id)
+
+    def fresh_module(self):
+        return str(TrainingModule._get_collection().insert_one({
+            'title': self.unique('Bench module '), 'description': '', 'content': '',
+            'is_active': True, 'created_by': ObjectId(self.instructor), 'assigned_count': 0, 'completed_count': 0,
+        }).inserted_id)
+
+    def fresh_assignment(self):
+        return str(ModuleAssignment._get_collection().insert_one({
+            'trainee': ObjectId(self.trainee), 'module': ObjectId(self.fresh_module()),
+            'assigned_by': ObjectId(self.instructor), 'is_completed': False, 'completed_at': None,
+        }).inserted_id)
+
+    def fresh_job(self):
+        return str(Job._get_collection().insert_one({
+            'kind': 'bench', 'status': 'succeeded', 'progress': {}, 'result': {},
+            'created_by': ObjectId(self.instructor),
+        }).inserted_id)
+
+    def credentials(self):
+        return {'username': 'trainee0', 'password': sampledata.SAMPLE_PASSWORD}
+
+    def new_user(self):
+        name = self.unique('benchregister')
+        return {'username': name, 'email': f'{name}@example.com', 'password': 'benchpassword',
+                'role': 'trainee', 'first_name': 'Bench', 'last_name': 'User'}
+
+
+def endpoints():
+    # One entry per route and method in training/urls.py; url and data are
+    # built per iteration so destructive endpoints get a fresh target
+    return [
+        Endpoint('register', 'post', None, lambda ctx: reverse('register'), BenchContext.new_user),
+        Endpoint('login', 'post', None, lambda ctx: reverse('login'), BenchContext.credentials),
+        Endpoint('logout', 'post', 'trainee', lambda ctx: reverse('logout'), lambda ctx: {}),
+        Endpoint('user-profile', 'get', 'trainee', lambda ctx: reverse('user-profile'), None),
+        Endpoint('user-profile', 'put', 'trainee', lambda ctx: reverse('user-profile'),
+                 lambda ctx: {'first_name': 'Trainee'}),
+        Endpoint('change-password', 'post', 'trainee', lambda ctx: reverse('change-password'),
+                 lambda ctx: {'old_password': sampledata.SAMPLE_PASSWORD, 'new_password': sampledata.SAMPLE_PASSWORD}),
+        Endpoint('module-list-create', 'get', 'instructor', lambda ctx: reverse('module-list-create'), None),
+        Endpoint('module-list-create', 'post', 'instructor', lambda ctx: reverse('module-list-create'),
+                 lambda ctx: {'title': ctx.unique('Bench module '), 'description': '', 'content': ''}),
+        Endpoint('bulk-assign-modules', 'post', 'instructor', lambda ctx: reverse('bulk-assign-modules'),
+                 lambda ctx: {'module_ids': [ctx.fresh_module()], 'trainee_ids': [str(pk) for pk in ctx.ids['trainees'][:50]]}),
+        Endpoint('module-search', 'get', 'instructor', lambda ctx: reverse('module-search') + '?q=sample+module', None),
+        Endpoint('module-suggest', 'get', 'instructor', lambda ctx: reverse('module-suggest') + '?q=modle+1', None),
+        Endpoint('module-detail', 'get', 'instructor', lambda ctx: reverse('module-detail', args=[ctx.module]), None),
+        Endpoint('module-detail', 'put', 'instructor', lambda ctx: reverse('module-detail', args=[ctx.fresh_module()]),
+                 lambda ctx: {'title': ctx.unique('Renamed module ')}),
+        Endpoint('module-detail', 'delete', 'instructor', lambda ctx: reverse('module-detail', args=[ctx.fresh_module()]), None),
+        Endpoint('assignment-list-create', 'get', 'instructor',
+                 lambda ctx: reverse('assignment-list-create') + f'?module_id={ctx.module}', None),
+        Endpoint('assignment-list-create', 'post', 'instructor', lambda ctx: reverse('assignment-list-create'),
+                 lambda ctx: {'trainee_id': ctx.trainee, 'module_id': ctx.fresh_module()}),
+        Endpoint('assignment-detail', 'get', 'instructor',
+                 lambda ctx: reverse('assignment-detail', args=[ctx.assignment]), None),
+        Endpoint('trainee-dashboard', 'get', 'trainee', lambda ctx: reverse('trainee-dashboard'), None),
+        Endpoint('instructor-dashboard', 'get', 'instructor', lambda ctx: reverse('instructor-dashboard'), None),
+        Endpoint('superadmin-dashboard', 'get', 'superadmin', lambda ctx: reverse('superadmin-dashboard'), None),
+        Endpoint('trainee-modules', 'get', 'trainee', lambda ctx: reverse('trainee-modules'), None),
+        Endpoint('mark-completed', 'post', 'trainee', lambda ctx: reverse('mark-completed', args=[ctx.fresh_assignment()]), None),
+        Endpoint('trainee-list', 'get', 'instructor', lambda ctx: reverse('trainee-list'), None),
+        Endpoint('trainee-delete', 'delete', 'instructor', lambda ctx: reverse('trainee-delete', args=[ctx.fresh_user()]), None),
+        Endpoint('trainee-progress', 'get', 'instructor', lambda ctx: reverse('trainee-progress', args=[ctx.trainee]), None),
+        Endpoint('bulk-assign-module', 'post', 'instructor',
+                 lambda ctx: reverse('bulk-assign-module', args=[ctx.fresh_module()]),
+                 lambda ctx: {'trainee_ids': [str(pk) for pk in ctx.ids['trainees'][:50]]}),
+        Endpoint('message-instructor', 'post', 'trainee', lambda ctx: reverse('message-instructor'),
+                 lambda ctx: {'content': 'Benchmark question'}),
+        Endpoint('instructor-messages', 'get', 'instructor', lambda ctx: reverse('instructor-messages'), None),
+        Endpoint('instructor-reply', 'post', 'instructor', lambda ctx: reverse('instructor-reply', args=[ctx.message]),
+                 lambda ctx: {'content': 'Benchmark reply'}),
+        Endpoint('trainee-messages', 'get', 'trainee', lambda ctx: reverse('trainee-messages'), None),
+        Endpoint('export', 'get', 'instructor', lambda ctx: reverse('export', args=['assignments', 'ndjson']), None),
+        Endpoint('superadmin-user-list', 'get', 'superadmin', lambda ctx: reverse('superadmin-user-list'), None),
+        Endpoint('superadmin-user-create', 'post', 'superadmin', lambda ctx: reverse('superadmin-user-create'),
+                 BenchContext.new_user),
+        Endpoint('superadmin-user-edit', 'put', 'superadmin',
+                 lambda ctx: reverse('superadmin-user-edit', args=[ctx.fresh_user()]), lambda ctx: {'first_name': 'Edited'}),
+        Endpoint('superadmin-user-delete', 'delete', 'superadmin',
+                 lambda ctx: reverse('superadmin-user-delete', args=[ctx.fresh_user()]), None),
+        Endpoint('job-create', 'post', 'superadmin', lambda ctx: reverse('job-create'),
+                 lambda ctx: {'kind': 'rebuild_progress_counters'}),
+        Endpoint('job-detail', 'get', 'instructor', lambda ctx: reverse('job-detail', args=[ctx.fresh_job()]), None),
+        Endpoint('mongo-pool-metrics', 'get', 'superadmin', lambda ctx: reverse('mongo-pool-metrics'), None),
+        Endpoint('async-module-list', 'get', 'instructor', lambda ctx: reverse('async-module-list'), None),
+        Endpoint('async-trainee-dashboard', 'get', 'trainee', lambda ctx: reverse('async-trainee-dashboard'), None),
+        Endpoint('async-instructor-dashboard', 'get', 'instructor', lambda ctx: reverse('async-instructor-dashboard'), None),
+        Endpoint('async-trainee-messages', 'get', 'trainee', lambda ctx: reverse('async-trainee-messages'), None),
+    ]
+
+
+def use_database(name):
+    # Reconnect mongoengine (and, through get_db(), the async views) to another database
+    uri = urlsplit(settings.MONGODB_URI)._replace(path='/' + name).geturl()
+    mongo.configure(uri, settings.MONGODB_CLIENT_OPTIONS)
+    user_cache.clear()
+
+
+class Command(BaseCommand):
+    help = ('Seed a separate database and drive every API route through the Django test client, '
+            'reporting latency percentiles, Mongo command counts and response sizes against stored budgets.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Database to seed and benchmark (default: <app database>_bench). It is dropped first.')
+        parser.add_argument('--trainees', type=int, default=200)
+        parser.add_argument('--instructors', type=int, default=5)
+        parser.add_argument('--modules', type=int, default=50)
+        parser.add_argument('--assignments-per-trainee', type=int, default=10)
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--endpoint', action='append', help='Only run endpoints with this route name (repeatable).')
+        parser.add_argument('--budgets', default=DEFAULT_BUDGETS, help='JSON file with per-endpoint budgets.')
+        parser.add_argument('--strict', action=argparse.BooleanOptionalAction, default=True,
+                            help='Fail endpoints that have no recorded budget (default); --no-strict only reports them.')
+        parser.add_argument('--update-budgets', action='store_true',
+                            help='Write the measured values (with headroom) as the new budgets instead of checking them.')
+        parser.add_argument('--latency-headroom', type=float, default=2.0,
+                            help='Multiplier applied to measured p95 latency when writing budgets.')
+
+    def seed(self, options):
+        ids = sampledata.seed(
+            trainees=options['trainees'], instructors=options['instructors'], modules=options['modules'],
+            assignments_per_trainee=options['assignments_per_trainee'], messages=options['messages'],
+            random_seed=options['seed'],
+        )
+        return ids
+
+    def tokens(self, ids):
+        superadmin = User._get_collection().insert_one({
+            'username': 'superadmin', 'email': 'superadmin@example.com', 'password': 'x',
+            'role': 'superadmin', 'is_active': True,
+        }).inserted_id
+        users = {'instructor': ids['instructors'][0], 'trainee': ids['trainees'][0], 'superadmin': superadmin}
+        return {role: generate_jwt(User._from_son(User._get_collection().find_one({'_id': pk})))
+                for role, pk in users.items()}
+
+    def request(self, client, endpoint, ctx, tokens, counter):
+        url = endpoint.url(ctx)
+        data = endpoint.data(ctx) if endpoint.data else None
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {tokens[endpoint.role]}'} if endpoint.role else {}
+        if data is not None:
+            extra.update(data=json.dumps(data), content_type='application/json')
+        counter.reset()
+        started = time.perf_counter()
+        response = getattr(client, endpoint.method)(url, **extra)
+        size = len(b''.join(response.streaming_content) if response.streaming else response.content)
+        elapsed = (time.perf_counter() - started) * 1000
+        return response.status_code, elapsed, sum(counter.reset().values()), size
+
+    def check(self, key, result, budgets, strict):
+        budget = budgets.get(key)
+        if budget is None:
+            return ['no budget (record one with --update-budgets)'] if strict else None
+        failures = []
+        if 'status' in budget and result['status'] != budget['status']:
+            failures.append(f'status {result["status"]} != {budget["status"]}')
+        if result['commands'] > budget.get('commands', math.inf):
+            failures.append(f'commands {result["commands"]} > {budget["commands"]}')
+        if result['p95_ms'] > budget.get('p95_ms', math.inf):
+            failures.append(f'p95 {result["p95_ms"]:.1f}ms > {budget["p95_ms"]}ms')
+        if result['bytes'] > budget.get('bytes', math.inf):
+            failures.append(f'bytes {result["bytes"]} > {budget["bytes"]}')
+        return failures
+
+    def handle(self, *args, **options):
+        app_database = get_db().name
+        database = options['database'] or f'{app_database}_bench'
+        if database == app_database:
+            raise CommandError('Refusing to benchmark against the application database.')
+        if options['strict'] and not options['update_budgets'] and not os.path.exists(options['budgets']):
+            raise CommandError(f'No budgets file at {options["budgets"]}. Record one with --update-budgets '
+                               'or pass --no-strict to only report the measurements.')
+
+        counter = CommandCounter()
+        monitoring.register(counter)
+        use_database(database)
+        get_db().client.drop_database(database)
+        try:
+            results = self.run(options, counter)
+        finally:
+            get_db().client.drop_database(database)
+
+        if options['update_budgets']:
+            budgets = self.load_budgets(options['budgets'])
+            budgets.update({
+                key: {
+                    'status': result['status'],
+                    'commands': result['commands'],
+                    'p95_ms': round(result['p95_ms'] * options['latency_headroom'], 1),
+                    'bytes': math.ceil(result['bytes'] * 1.1),
+                }
+                for key, result in results.items()
+            })
+            with open(options['budgets'], 'w') as budgets_file:
+                json.dump(budgets, budgets_file, indent=2, sort_keys=True)
+                budgets_file.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Wrote budgets for {len(results)} endpoints to {options["budgets"]}.'))
+            return
+        over_budget = sum(1 for result in results.values() if result['failed'])
+        if over_budget:
+            raise CommandError(f'{over_budget} endpoint(s) failed the budget check.')
+        unbudgeted = sum(1 for result in results.values() if not result['budgeted'])
+        self.stdout.write(self.style.SUCCESS(
+            f'All {len(results) - unbudgeted} budgeted endpoints within budget'
+            + (f'; {unbudgeted} without a budget.' if unbudgeted else '.')
+        ))
+
+    def load_budgets(self, path):
+        if not os.path.exists(path):
+            return {}
+        with open(path) as budgets_file:
+            return json.load(budgets_file)
+
+    def run(self, options, counter):
+        call_command('sync_indexes', stdout=io.StringIO())
+        ids = self.seed(options)
+        tokens = self.tokens(ids)
+        ctx = BenchContext(ids)
+
+        selected = [endpoint for endpoint in endpoints()
+                    if not options['endpoint'] or endpoint.name in options['endpoint']]
+        covered = {endpoint.name for endpoint in endpoints()}
+        for pattern in urls.urlpatterns:
+            if pattern.name not in covered:
+                self.stderr.write(self.style.WARNING(f'Route {pattern.name} has no benchmark.'))
+
+        budgets = self.load_budgets(options['budgets'])
+        # Server errors are reported per endpoint instead of aborting the run
+        client = Client(raise_request_exception=False, HTTP_HOST='localhost')
+        results = {}
+        self.stdout.write(f'{"endpoint":<40} {"status":>6} {"p50":>8} {"p95":>8} {"p99":>8} {"cmds":>5} {"bytes":>9}')
+        for endpoint in selected:
+            key = f'{endpoint.name} {endpoint.method.upper()}'
+            for _ in range(options['warmup']):
+                self.request(client, endpoint, ctx, tokens, counter)
+            samples = [self.request(client, endpoint, ctx, tokens, counter) for _ in range(options['iterations'])]
+            latencies = [elapsed for _, elapsed, _, _ in samples]
+            result = results[key] = {
+                'status': samples[-1][0],
+                'p50_ms': percentile(latencies, 50),
+                'p95_ms': percentile(latencies, 95),
+                'p99_ms': percentile(latencies, 99),
+                'commands': max(commands for _, _, commands, _ in samples),
+                'bytes': max(size for _, _, _, size in samples),
+                'failed': False,
+            }
+            line = (f'{key:<40} {result["status"]:>6} {result["p50_ms"]:>7.1f}ms {result["p95_ms"]:>6.1f}ms '
+                    f'{result["p99_ms"]:>6.1f}ms {result["commands"]:>5} {result["bytes"]:>9}')
+            if options['update_budgets']:
+                self.stdout.write(line)
+                continue
+            failures = self.check(key, result, budgets, options['strict'])
+            result['budgeted'] = key in budgets
+            if failures:
+                result['failed'] = True
+                self.stdout.write(self.style.ERROR(f'{line}  {"; ".join(failures)}'))
+            elif failures is None:
+                self.stdout.write(f'{line}  (no budget)')
+            else:
+                self.stdout.write(line)
+
+        return results
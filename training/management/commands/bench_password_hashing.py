@@ -0,0 +1,80 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from training.tracing import percentile
+
+
+def request(url, data=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    body = json.dumps(data).encode('utf-8') if data is not None else None
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, body, headers), timeout=30) as response:
+            status, payload = response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        status, payload = exc.code, exc.read()
+    return status, payload, (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Measure login throughput and the latency of another endpoint during a login burst against a running server.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Base URL of the running API server.')
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--logins', type=int, default=200, help='Total logins in the burst.')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent login clients.')
+        parser.add_argument('--probe-path', default='/api/user/profile/', help='Authenticated GET measured alongside the burst.')
+        parser.add_argument('--probe-requests', type=int, default=50, help='Probe requests for the idle baseline.')
+
+    def probe(self, url, token, count=None, until=None):
+        latencies = []
+        while (count is None or len(latencies) < count) and (until is None or not until.is_set()):
+            status, _, elapsed = request(url, token=token)
+            if status != 200:
+                raise CommandError(f'Probe returned HTTP {status}')
+            latencies.append(elapsed)
+        return latencies
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        login_url = base + '/api/auth/login/'
+        credentials = {'username': options['username'], 'password': options['password']}
+        status, payload, _ = request(login_url, credentials)
+        if status != 200:
+            raise CommandError(f'Login failed with HTTP {status}: {payload[:200]!r}')
+        token = json.loads(payload)['access']
+        probe_url = base + options['probe_path']
+
+        baseline = self.probe(probe_url, token, count=options['probe_requests'])
+
+        done = threading.Event()
+        under_load = []
+        prober = threading.Thread(target=lambda: under_load.extend(self.probe(probe_url, token, until=done)))
+        prober.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(lambda _: request(login_url, credentials), range(options['logins'])))
+        duration = time.perf_counter() - started
+        done.set()
+        prober.join()
+
+        ok = [elapsed for status, _, elapsed in results if status == 200]
+        busy = sum(1 for status, _, _ in results if status == 503)
+        failed = len(results) - len(ok) - busy
+        self.stdout.write(f'Logins: {len(ok)} ok, {busy} shed (503), {failed} failed in {duration:.2f}s '
+                          f'({len(ok) / duration:.1f}/s)')
+        self.stdout.write(f'Login latency ms: p50 {percentile(ok, 50):.1f}  p99 {percentile(ok, 99):.1f}')
+        self.stdout.write(f'{options["probe_path"]} idle ms: p50 {percentile(baseline, 50):.1f}  '
+                          f'p99 {percentile(baseline, 99):.1f}')
+        self.stdout.write(f'{options["probe_path"]} during burst ms: p50 {percentile(under_load, 50):.1f}  '
+                          f'p99 {percentile(under_load, 99):.1f}  ({len(under_load)} requests)')
+        self.stdout.write(self.style.SUCCESS('Benchmark complete.'))
@@ -0,0 +1,93 @@
+import io
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client
+from django.urls import reverse
+from mongoengine.connection import get_db
+from rest_framework.renderers import JSONRenderer
+from training.management.commands import bench_endpoints
+from training.renderers import MessagePackRenderer, ORJSONRenderer
+from training.tracing import percentile
+
+RENDERERS = [
+    ('drf-json', JSONRenderer()),
+    ('orjson', ORJSONRenderer()),
+    ('msgpack', MessagePackRenderer()),
+]
+
+
+def endpoints():
+    # The largest responses: full pages of each list plus the dashboards
+    page = f'?page_size={settings.KEYSET_MAX_PAGE_SIZE}'
+    Endpoint = bench_endpoints.Endpoint
+    return [
+        Endpoint('module-list-create', 'get', 'instructor', lambda ctx: reverse('module-list-create') + page, None),
+        Endpoint('assignment-list-create', 'get', 'instructor', lambda ctx: reverse('assignment-list-create') + page, None),
+        Endpoint('trainee-list', 'get', 'instructor', lambda ctx: reverse('trainee-list') + page, None),
+        Endpoint('instructor-messages', 'get', 'instructor', lambda ctx: reverse('instructor-messages') + page, None),
+        Endpoint('superadmin-user-list', 'get', 'superadmin', lambda ctx: reverse('superadmin-user-list') + page, None),
+        Endpoint('instructor-dashboard', 'get', 'instructor', lambda ctx: reverse('instructor-dashboard'), None),
+        Endpoint('trainee-dashboard', 'get', 'trainee', lambda ctx: reverse('trainee-dashboard'), None),
+    ]
+
+
+class Command(bench_endpoints.Command):
+    help = ('Seed a separate database, fetch the largest API responses once and compare how long '
+            'DRF\'s JSON renderer, orjson and MessagePack take to encode them and how big the results are.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', help='Database to seed (default: <app database>_bench). It is dropped first.')
+        parser.add_argument('--trainees', type=int, default=2000)
+        parser.add_argument('--instructors', type=int, default=5)
+        parser.add_argument('--modules', type=int, default=500)
+        parser.add_argument('--assignments-per-trainee', type=int, default=10)
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        app_database = get_db().name
+        database = options['database'] or f'{app_database}_bench'
+        if database == app_database:
+            raise CommandError('Refusing to benchmark against the application database.')
+
+        bench_endpoints.use_database(database)
+        get_db().client.drop_database(database)
+        try:
+            self.run(options)
+        finally:
+            get_db().client.drop_database(database)
+
+    def encode(self, renderer, data, iterations):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            body = renderer.render(data, renderer.media_type, {})
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings, len(body)
+
+    def run(self, options):
+        call_command('sync_indexes', stdout=io.StringIO())
+        ids = self.seed(options)
+        tokens = self.tokens(ids)
+        ctx = bench_endpoints.BenchContext(ids)
+        client = Client(raise_request_exception=False, HTTP_HOST='localhost')
+
+        self.stdout.write(f'{"endpoint":<28} {"renderer":<9} {"p50":>9} {"p95":>9} {"bytes":>10} {"speedup":>8} {"size":>6}')
+        for endpoint in endpoints():
+            response = client.get(endpoint.url(ctx), HTTP_AUTHORIZATION=f'Bearer {tokens[endpoint.role]}')
+            if response.status_code != 200:
+                self.stderr.write(self.style.WARNING(f'{endpoint.name}: status {response.status_code}, skipped.'))
+                continue
+            baseline = None
+            for name, renderer in RENDERERS:
+                timings, size = self.encode(renderer, response.data, options['iterations'])
+                p50 = percentile(timings, 50)
+                baseline = baseline or (p50, size)
+                self.stdout.write(
+                    f'{endpoint.name:<28} {name:<9} {p50:>7.2f}ms {percentile(timings, 95):>7.2f}ms {size:>10} '
+                    f'{baseline[0] / p50 if p50 else 0:>7.1f}x {size / baseline[1]:>6.0%}'
+                )
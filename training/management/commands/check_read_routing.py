@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mongoengine.connection import get_db
+from pymongo import MongoClient, monitoring
+from training import routing
+from training.models import User
+
+
+class ServedBy(monitoring.CommandListener):
+    # Remembers the server address of the last command started
+    address = None
+
+    def started(self, event):
+        self.address = event.connection_id
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+class Command(BaseCommand):
+    help = ('Show which replica set member serves transactional and analytic reads. '
+            'Works against a local single-host replica set as well as a full one.')
+
+    def handle(self, *args, **options):
+        listener = ServedBy()
+        client = MongoClient(settings.MONGODB_URI, event_listeners=[listener], **settings.MONGODB_CLIENT_OPTIONS)
+        try:
+            hello = client.admin.command('hello')
+            if 'setName' not in hello:
+                self.stdout.write(self.style.WARNING(
+                    'Not connected to a replica set; every read goes to the single server. '
+                    'Add ?replicaSet=<name> to MONGODB_URI.'
+                ))
+            else:
+                secondaries = ', '.join(f'{host}:{port}' for host, port in sorted(client.secondaries)) or 'none'
+                self.stdout.write(f"Replica set {hello['setName']}: primary {client.primary[0]}:{client.primary[1]}, "
+                                  f"secondaries {secondaries}")
+
+            database = client[get_db().name]
+            for kind in (routing.TRANSACTIONAL, routing.ANALYTIC):
+                preference = routing.read_preference(kind)
+                users = routing.route(database[User._get_collection_name()], kind)
+                users.find_one({}, {'_id': 1})
+                host, port = listener.address
+                if client.primary is None:
+                    member = 'standalone'
+                else:
+                    member = 'primary' if listener.address == client.primary else 'secondary'
+                self.stdout.write(self.style.SUCCESS(
+                    f'{kind}: {preference.mongos_mode} {preference.document} -> {host}:{port} ({member})'
+                ))
+        finally:
+            client.close()
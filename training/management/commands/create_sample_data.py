@@ -1,11 +1,30 @@
-from django.core.management.base import BaseCommand
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from training import counters, sampledata, snapshots, versioning
 from training.models import User, TrainingModule, ModuleAssignment
 from datetime import datetime
 
 class Command(BaseCommand):
-    help = 'Create initial training modules and sample assignments.'
+    help = ('Create initial training modules and sample assignments. With --trainees, generate a large '
+            'deterministic dataset instead (see training.sampledata).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trainees', type=int, help='Generate this many trainees (bulk mode).')
+        parser.add_argument('--instructors', type=int, help='Default: one per 200 trainees.')
+        parser.add_argument('--modules', type=int, default=50)
+        parser.add_argument('--assignments-per-trainee', type=int, default=10,
+                            help='Mean; actual counts are skewed around it.')
+        parser.add_argument('--messages', type=int, default=0)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processes writing in parallel; 0 writes from this process.')
 
     def handle(self, *args, **options):
+        if options['trainees'] is not None:
+            return self.generate(options)
+
         # Create or fetch a sample instructor
         instructor = User.objects(username='sampleinstructor').first()
         if not instructor:
@@ -55,6 +74,7 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS('Created/verified sample trainee user.'))
 
         # Assign modules to the user, mark some as completed
+        added = []
         for i, module in enumerate(modules):
             assignment = ModuleAssignment.objects(trainee=user, module=module).first()
             if not assignment:
@@ -67,4 +87,29 @@ class Command(BaseCommand):
                     completed_at=datetime.now() if i < 3 else None
                 )
                 assignment.save()
-        self.stdout.write(self.style.SUCCESS('Assigned modules to sample trainee (3 completed, 3 incomplete).')) 
\ No newline at end of file
+                added.append((user, module, 1, int(assignment.is_completed)))
+        counters.apply(added)
+        self.stdout.write(self.style.SUCCESS('Assigned modules to sample trainee (3 completed, 3 incomplete).')) 
+
+    def generate(self, options):
+        if User.objects(username__in=['trainee0', 'instructor0']).count():
+            raise CommandError('Generated sample data already exists; use an empty database.')
+        started = time.perf_counter()
+        trainees = options['trainees']
+        ids = sampledata.seed(
+            trainees=trainees,
+            instructors=options['instructors'] or max(1, trainees // 200),
+            modules=options['modules'],
+            assignments_per_trainee=options['assignments_per_trainee'],
+            messages=options['messages'],
+            random_seed=options['seed'],
+            workers=options['workers'],
+            progress=self.stdout.write,
+        )
+        versioning.bump(versioning.MODULES, versioning.USERS)
+        snapshots.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(ids['instructors'])} instructors, {len(ids['trainees'])} trainees, "
+            f"{len(ids['modules'])} modules, {ids['assignments']} assignments and {ids['messages']} messages "
+            f"in {time.perf_counter() - started:.1f}s. Every user's password is '{sampledata.SAMPLE_PASSWORD}'."
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from training import exports
+
+
+class Command(BaseCommand):
+    help = 'Stream assignments or trainee progress as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--format', dest='fmt', choices=sorted(exports.FORMATS), default='ndjson')
+        parser.add_argument('--output', help='File to write to (defaults to stdout).')
+
+    def handle(self, *args, **options):
+        chunks, _ = exports.export(options['dataset'], options['fmt'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f'Exported {options["dataset"]} to {options["output"]}.'))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
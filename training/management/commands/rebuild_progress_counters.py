@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+from training import snapshots
+from training.models import User, TrainingModule, ModuleAssignment
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Rebuild trainee and module progress counters from the assignments collection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def rebuild(self, document_cls, group_field, assigned_field, completed_field, batch_size):
+        rows = ModuleAssignment.objects.aggregate([
+            {'$group': {
+                '_id': '$' + group_field,
+                'assigned': {'$sum': 1},
+                'completed': {'$sum': {'$cond': [{'$eq': ['$is_completed', True]}, 1, 0]}},
+            }},
+        ], allowDiskUse=True)
+
+        collection = document_cls._get_collection()
+        collection.update_many({}, {'$set': {assigned_field: 0, completed_field: 0}})
+        updated = 0
+        batch = []
+        for row in rows:
+            batch.append(UpdateOne(
+                {'_id': row['_id']},
+                {'$set': {assigned_field: row['assigned'], completed_field: row['completed']}},
+            ))
+            if len(batch) >= batch_size:
+                updated += collection.bulk_write(batch, ordered=False).matched_count
+                batch = []
+        if batch:
+            updated += collection.bulk_write(batch, ordered=False).matched_count
+        return updated
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        users = self.rebuild(User, 'trainee', 'total_assigned', 'completed', batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt progress counters for {users} trainees.'))
+        modules = self.rebuild(TrainingModule, 'module', 'assigned_count', 'completed_count', batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt progress counters for {modules} modules.'))
+        snapshots.invalidate()
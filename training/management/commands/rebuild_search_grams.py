@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+from training.models import TrainingModule
+from training.search import grams
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Recompute the title trigrams used for module search suggestions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        collection = TrainingModule._get_collection()
+        updated = 0
+        batch = []
+        for row in collection.find({}, {'title': 1}):
+            batch.append(UpdateOne({'_id': row['_id']}, {'$set': {'search_grams': grams(row.get('title'))}}))
+            if len(batch) >= options['batch_size']:
+                updated += collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search trigrams for {updated} modules.'))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from training import snapshots
+
+
+class Command(BaseCommand):
+    help = ('Recompute the precomputed instructor dashboard snapshot. '
+            'With --every, keep refreshing on that schedule (e.g. as a sidecar next to run_jobs).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0,
+                            help='Refresh every this many seconds instead of once.')
+
+    def refresh(self):
+        started = time.perf_counter()
+        generated_at = snapshots.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f'Refreshed the instructor dashboard snapshot as of {generated_at.isoformat()} '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
+
+    def handle(self, *args, **options):
+        if not options['every']:
+            return self.refresh()
+        try:
+            while True:
+                started = time.monotonic()
+                self.refresh()
+                time.sleep(max(0.0, options['every'] - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping.')
@@ -0,0 +1,90 @@
+import concurrent.futures
+import datetime
+import multiprocessing
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from training import jobs
+from training.models import Job
+
+
+class Command(BaseCommand):
+    help = ('Run queued background jobs on a fixed-size thread or process pool. '
+            'Use with JOB_RUNNER=worker so web processes only enqueue.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=settings.JOB_THREADS,
+                            help='Jobs run concurrently on this many threads.')
+        parser.add_argument('--processes', type=int, default=0,
+                            help='Run jobs on this many processes instead of threads.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between queue checks.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty.')
+
+    def executor(self, options):
+        if options['processes']:
+            return concurrent.futures.ProcessPoolExecutor(
+                options['processes'], mp_context=multiprocessing.get_context('spawn'), initializer=django.setup
+            )
+        return concurrent.futures.ThreadPoolExecutor(options['threads'], thread_name_prefix='job')
+
+    def finished(self, future, job_id):
+        exc = future.exception()
+        if exc is not None:
+            # The job never got to record its own outcome (e.g. its process died)
+            Job._get_collection().update_one(
+                {'_id': job_id, 'status': 'running'},
+                {'$set': {'status': 'failed', 'error': str(exc) or type(exc).__name__,
+                          'finished_at': datetime.datetime.utcnow()}},
+            )
+        job = Job.objects(id=job_id).only('kind', 'status').first()
+        style = self.style.SUCCESS if job and job.status == 'succeeded' else self.style.ERROR
+        self.stdout.write(style(f'Job {job_id} ({job.kind if job else "?"}) {job.status if job else "missing"}.'))
+
+    def handle(self, *args, **options):
+        size = options['processes'] or options['threads']
+        executor = self.executor(options)
+        running = {}
+        last_heartbeat = 0.0
+        self.stdout.write(f'Running jobs on {size} {"processes" if options["processes"] else "threads"} as {jobs.worker_name()}.')
+        try:
+            while True:
+                for future in [future for future in running if future.done()]:
+                    self.finished(future, running.pop(future))
+
+                if time.monotonic() - last_heartbeat >= settings.JOB_STALE_SECONDS / 3:
+                    jobs.heartbeat(running.values())
+                    requeued = jobs.requeue_stale()
+                    if requeued:
+                        self.stdout.write(self.style.WARNING(f'Re-queued {requeued} stalled job(s).'))
+                    jobs.run_periodic()
+                    last_heartbeat = time.monotonic()
+
+                # Only claim what the pool can start right away, so throughput stays fixed
+                while len(running) < size:
+                    job = jobs.claim()
+                    if job is None:
+                        break
+                    try:
+                        future = executor.submit(jobs.execute, job['_id'])
+                    except BrokenProcessPool:
+                        executor = self.executor(options)
+                        future = executor.submit(jobs.execute, job['_id'])
+                    running[future] = job['_id']
+                    self.stdout.write(f"Started job {job['_id']} ({job['kind']}).")
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                else:
+                    concurrent.futures.wait(running, timeout=options['poll_interval'],
+                                            return_when=concurrent.futures.FIRST_COMPLETED)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping; waiting for running jobs to finish.')
+            for future in concurrent.futures.as_completed(running):
+                self.finished(future, running[future])
+        finally:
+            executor.shutdown(wait=True)
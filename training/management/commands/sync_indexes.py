@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from pymongo.errors import OperationFailure
+from training.models import User, TrainingModule, ModuleAssignment, Message, Job, DashboardSnapshotRow, DashboardDirtyRow
+
+DOCUMENTS = [User, TrainingModule, ModuleAssignment, Message, Job, DashboardSnapshotRow, DashboardDirtyRow]
+
+# Index options that make two indexes on the same keys behave differently
+COMPARED_OPTIONS = ('unique', 'sparse', 'partialFilterExpression', 'expireAfterSeconds', 'weights', 'default_language')
+
+
+def index_name(spec):
+    if spec.get('name'):
+        return spec['name']
+    return '_'.join(f'{field}_{direction}' for field, direction in spec['fields'])
+
+
+def matches(spec, info):
+    key = list(info['key'])
+    # Text indexes are stored as _fts/_ftsx, so only the name can be compared
+    if key[0][0] != '_fts' and key != list(spec['fields']):
+        return False
+    for option in COMPARED_OPTIONS:
+        if (spec.get(option) or None) != (info.get(option) or None):
+            return False
+    for option, value in (spec.get('collation') or {}).items():
+        if (info.get('collation') or {}).get(option) != value:
+            return False
+    return True
+
+
+class Command(BaseCommand):
+    help = 'Create declared indexes, drop stale ones and report index sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change.')
+        parser.add_argument('--keep-stale', action='store_true', help='Do not drop undeclared indexes.')
+
+    def sync(self, document_cls, dry_run, keep_stale):
+        collection = document_cls._get_collection()
+        declared = {index_name(spec): spec for spec in document_cls._meta['index_specs']}
+        existing = collection.index_information()
+
+        for name, info in existing.items():
+            if name == '_id_':
+                continue
+            spec = declared.get(name)
+            if spec is not None and matches(spec, info):
+                continue
+            if spec is None and keep_stale:
+                self.stdout.write(f'  stale (kept): {name}')
+                continue
+            self.stdout.write(self.style.WARNING(f'  drop: {name}'))
+            if not dry_run:
+                collection.drop_index(name)
+
+        for name, spec in declared.items():
+            if name in existing and matches(spec, existing[name]):
+                continue
+            self.stdout.write(self.style.SUCCESS(f'  create: {name}'))
+            if dry_run:
+                continue
+            options = {key: value for key, value in spec.items() if key not in ('fields', 'cls')}
+            options.setdefault('name', name)
+            try:
+                collection.create_index(spec['fields'], **options)
+            except OperationFailure as exc:
+                self.stderr.write(self.style.ERROR(f'  failed to create {name}: {exc}'))
+
+    def report(self, document_cls):
+        collection_name = document_cls._get_collection_name()
+        try:
+            stats = document_cls._get_db().command('collStats', collection_name)
+        except OperationFailure as exc:
+            self.stderr.write(self.style.ERROR(f'  could not read index sizes: {exc}'))
+            return
+        for name, size in sorted(stats.get('indexSizes', {}).items()):
+            self.stdout.write(f'  {name}: {size / 1024:.1f} KiB')
+        self.stdout.write(f'  total: {stats.get("totalIndexSize", 0) / 1024:.1f} KiB '
+                          f'for {stats.get("count", 0)} documents')
+
+    def handle(self, *args, **options):
+        for document_cls in DOCUMENTS:
+            self.stdout.write(f'{document_cls._get_collection_name()}:')
+            self.sync(document_cls, options['dry_run'], options['keep_stale'])
+            self.report(document_cls)
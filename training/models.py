@@ -1,6 +1,23 @@
 import mongoengine as me
 import datetime
 
+from django.conf import settings
+
+from .hashing import password_hasher
+
+# Collation for case-insensitive lookups; a query must use it to be served by an index built with it
+CASE_INSENSITIVE = {'locale': 'en', 'strength': 2}
+
+
+def ensure_unique_indexes(document_cls):
+    """Create a document's unique indexes; ``sync_indexes`` manages all the others."""
+    collection = document_cls._get_collection()
+    for spec in document_cls._meta['index_specs']:
+        if spec.get('unique'):
+            options = {key: value for key, value in spec.items() if key not in ('fields', 'cls')}
+            collection.create_index(spec['fields'], **options)
+
+
 class User(me.Document):
     username = me.StringField(required=True, unique=True)
     email = me.EmailField(required=True, unique=True)
@@ -11,6 +28,37 @@ class User(me.Document):
     last_name = me.StringField()
     created_at = me.DateTimeField(default=datetime.datetime.utcnow)
     updated_at = me.DateTimeField(default=datetime.datetime.utcnow)
+    # Progress counters, maintained by training.counters
+    total_assigned = me.IntField(default=0)
+    completed = me.IntField(default=0)
+
+    meta = {
+        'indexes': [
+            ('role', 'is_active', '_id'),
+            # Prefix search in the trainee directory
+            {'fields': ('role', 'is_active', 'username'), 'collation': CASE_INSENSITIVE},
+            {'fields': ('role', 'is_active', 'email'), 'collation': CASE_INSENSITIVE},
+        ],
+        # Only the unique username/email indexes, see ensure_indexes
+        'auto_create_index': True,
+    }
+
+    @classmethod
+    def ensure_indexes(cls):
+        # Uniqueness has to hold from the first request, before sync_indexes has run
+        ensure_unique_indexes(cls)
+
+    # Lets DRF's IsAuthenticated treat an authenticated User like a Django user
+    @property
+    def is_authenticated(self):
+        return True
+
+    def set_password(self, raw_password):
+        self.password = password_hasher.hash(raw_password)
+
+    def check_password(self, raw_password):
+        valid, _ = password_hasher.verify(raw_password, self.password)
+        return valid
 
 class TrainingModule(me.Document):
     title = me.StringField(required=True, max_length=200)
@@ -21,6 +69,26 @@ class TrainingModule(me.Document):
     is_active = me.BooleanField(default=True)
     created_at = me.DateTimeField(default=datetime.datetime.utcnow)
     updated_at = me.DateTimeField(default=datetime.datetime.utcnow)
+    # Progress counters, maintained by training.counters
+    assigned_count = me.IntField(default=0)
+    completed_count = me.IntField(default=0)
+    # Title trigrams for search suggestions, see training.search
+    search_grams = me.ListField(me.StringField())
+
+    meta = {
+        'indexes': [
+            ('is_active', '_id'),
+            # MongoDB allows one text index per collection; a title hit outranks a body hit
+            {'fields': ('$title', '$description', '$content'), 'name': 'module_text',
+             'weights': {'title': 10, 'description': 4, 'content': 1}, 'default_language': 'english'},
+            'search_grams',
+        ],
+        'auto_create_index': False,
+    }
+
+    def clean(self):
+        from .search import grams
+        self.search_grams = grams(self.title)
 
 class ModuleAssignment(me.Document):
     trainee = me.ReferenceField(User, required=True)
@@ -30,8 +98,157 @@ class ModuleAssignment(me.Document):
     completed_at = me.DateTimeField()
     assigned_at = me.DateTimeField(default=datetime.datetime.utcnow)
 
+    meta = {
+        'indexes': [
+            {'fields': ('trainee', 'module'), 'unique': True},
+            # Also walks a module's trainees in order for the trainee directory
+            ('module', 'is_completed', 'trainee'),
+            ('module', '_id'),
+            ('is_completed', 'completed_at'),
+        ],
+        # Only the unique (trainee, module) index, see ensure_indexes
+        'auto_create_index': True,
+    }
+
+    @classmethod
+    def ensure_indexes(cls):
+        # Uniqueness has to hold from the first request, before sync_indexes has run
+        ensure_unique_indexes(cls)
+
+    def mark_completed(self):
+        from .counters import assignment_completed
+        now = datetime.datetime.utcnow()
+        # Only the request that flips the flag bumps the counters
+        updated = ModuleAssignment.objects(id=self.pk, is_completed=False).update_one(
+            set__is_completed=True, set__completed_at=now
+        )
+        if updated:
+            assignment_completed(self._data.get('trainee'), self._data.get('module'))
+            self.is_completed = True
+            self.completed_at = now
+
+    def delete(self):
+        from .counters import assignment_removed
+        removed = ModuleAssignment._get_collection().find_one_and_delete(
+            {'_id': self.pk}, projection={'trainee': 1, 'module': 1, 'is_completed': 1}
+        )
+        if removed:
+            assignment_removed(removed.get('trainee'), removed.get('module'), removed.get('is_completed', False))
+
 class Message(me.Document):
     sender = me.ReferenceField(User, required=True)
-    recipient = me.ReferenceField(User, required=True)
+    # Direct messages set recipient; broadcasts store one document with recipients
+    recipient = me.ReferenceField(User)
+    recipients = me.ListField(me.ReferenceField(User))
     content = me.StringField()
-    timestamp = me.DateTimeField(default=datetime.datetime.utcnow) 
\ No newline at end of file
+    timestamp = me.DateTimeField(default=datetime.datetime.utcnow)
+
+    meta = {
+        'indexes': [
+            ('recipient', '-timestamp', '-_id'),
+            ('sender', '-timestamp', '-_id'),
+            ('recipients', '-timestamp', '-_id'),
+        ],
+        'auto_create_index': False,
+    }
+
+
+class CollectionVersion(me.Document):
+    # Version stamp per cache scope (e.g. 'modules', 'assignments:<trainee id>'),
+    # bumped by write paths and used for ETags
+    key = me.StringField(primary_key=True)
+    version = me.IntField(default=0)
+    updated_at = me.DateTimeField()
+
+    meta = {
+        'collection': 'collection_version',
+        'auto_create_index': False,
+    }
+
+
+class Job(me.Document):
+    # Background job run by training.jobs; progress is written while it runs
+    kind = me.StringField(required=True)
+    params = me.DictField()
+    status = me.StringField(choices=('queued', 'running', 'succeeded', 'failed'), default='queued')
+    progress = me.DictField()
+    result = me.DictField()
+    error = me.StringField()
+    created_by = me.ObjectIdField()
+    created_at = me.DateTimeField(default=datetime.datetime.utcnow)
+    started_at = me.DateTimeField()
+    finished_at = me.DateTimeField()
+    # Set by whoever runs the job; a running job whose heartbeat stops is re-queued
+    worker = me.StringField()
+    heartbeat_at = me.DateTimeField()
+    attempts = me.IntField(default=0)
+
+    meta = {
+        'indexes': [
+            ('status', 'created_at'),
+            ('status', 'heartbeat_at'),
+            # Finished jobs are deleted JOB_RETENTION_SECONDS after they end
+            {'fields': ['finished_at'], 'expireAfterSeconds': settings.JOB_RETENTION_SECONDS},
+        ],
+        'auto_create_index': False,
+    }
+
+
+class DashboardSnapshot(me.Document):
+    # Precomputed dashboard state, refreshed and patched by training.snapshots; the
+    # trainee and module rows are DashboardSnapshotRow documents. needs_refresh is
+    # set for changes too broad to patch row by row
+    key = me.StringField(primary_key=True)
+    generated_at = me.DateTimeField()
+    patched_at = me.DateTimeField()
+    # Totals over the rows, incremented as rows are patched
+    total_trainees = me.IntField(default=0)
+    total_modules = me.IntField(default=0)
+    assigned_modules_count = me.IntField(default=0)
+    assigned_total = me.IntField(default=0)
+    completed_total = me.IntField(default=0)
+    progress_distribution = me.DictField()
+    in_progress = me.IntField(default=0)
+    needs_refresh = me.BooleanField(default=False)
+    # Held by a patch or refresh; see snapshots._lease
+    leased_until = me.DateTimeField()
+    refresh_requested_at = me.DateTimeField()
+
+    meta = {
+        'collection': 'dashboard_snapshot',
+        'auto_create_index': False,
+    }
+
+
+class DashboardSnapshotRow(me.Document):
+    # One trainee or module row of the dashboard snapshot, keyed by that trainee's or module's id
+    entity = me.ObjectIdField(primary_key=True)
+    kind = me.StringField(choices=('trainee', 'module'), required=True)
+    row = me.DictField()
+    refreshed_at = me.DateTimeField()
+
+    meta = {
+        'collection': 'dashboard_snapshot_row',
+        'indexes': [
+            ('kind', 'entity'),
+            ('kind', '-row.completion_percentage', 'entity'),
+            'refreshed_at',
+        ],
+        'auto_create_index': False,
+    }
+
+
+class DashboardDirtyRow(me.Document):
+    # A trainee or module whose dashboard row is patched on the next read; one small
+    # document per entity, so marking rows never contends on the snapshot document
+    entity = me.ObjectIdField(primary_key=True)
+    kind = me.StringField(choices=('trainee', 'module'), required=True)
+    marked_at = me.DateTimeField()
+
+    meta = {
+        'collection': 'dashboard_dirty_row',
+        'indexes': [
+            'marked_at',
+        ],
+        'auto_create_index': False,
+    }
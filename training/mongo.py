@@ -0,0 +1,153 @@
+import collections
+import os
+import threading
+import time
+
+from mongoengine import connection as me_connection
+from mongoengine import Document
+from mongoengine.base.common import _get_documents_by_db
+from pymongo import monitoring
+
+from . import tracing
+from .tracing import percentile
+
+ALIAS = me_connection.DEFAULT_CONNECTION_NAME
+# Checkout waits kept for the percentiles in PoolMetrics.snapshot()
+RECENT_WAITS = 1000
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters for this process, including checkout wait times.
+
+    Waits are also added to the current request's trace, so they show up in
+    ``Server-Timing`` next to the command time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._started = {}
+        self.checkouts = 0
+        self.failures = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.recent = collections.deque(maxlen=RECENT_WAITS)
+        self.open = 0
+        self.in_use = 0
+        self.cleared = 0
+
+    def _waited(self, event):
+        started = self._started.pop((event.address, threading.get_ident()), None)
+        return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        # Checkouts are synchronous in the calling thread
+        with self._lock:
+            self._started[(event.address, threading.get_ident())] = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            wait_ms = self._waited(event)
+            self.checkouts += 1
+            self.in_use += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            self.recent.append(wait_ms)
+        trace = tracing.current_trace()
+        if trace is not None:
+            trace.pool_wait(wait_ms)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            wait_ms = self._waited(event)
+            self.failures += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            self.recent.append(wait_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(0, self.open - 1)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.cleared += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            recent = list(self.recent)
+            attempts = self.checkouts + self.failures
+            return {
+                'pid': os.getpid(),
+                'checkouts': self.checkouts,
+                'failures': self.failures,
+                'connections_open': self.open,
+                'connections_in_use': self.in_use,
+                'pool_cleared': self.cleared,
+                'wait_ms': {
+                    'avg': round(self.wait_ms_total / attempts, 3) if attempts else 0.0,
+                    'p50': round(percentile(recent, 50), 3),
+                    'p95': round(percentile(recent, 95), 3),
+                    'p99': round(percentile(recent, 99), 3),
+                    'max': round(self.wait_ms_max, 3),
+                },
+            }
+
+
+pool_metrics = PoolMetrics()
+_options = {}
+
+
+def client_options():
+    """Keyword arguments for every MongoClient the app creates (pool sizing, compression, metrics)."""
+    return dict(_options, event_listeners=[pool_metrics])
+
+
+def configure(uri, options=None):
+    """Register the default mongoengine connection without opening it.
+
+    The client is created on first use, so under a pre-forking server each
+    worker builds its own pool after the fork.
+    """
+    _options.clear()
+    _options.update(options or {})
+    me_connection.disconnect(ALIAS)
+    me_connection.register_connection(ALIAS, host=uri, **client_options())
+
+
+def _after_fork():
+    # A client inherited from the parent shares its sockets; drop it without
+    # closing so the child opens its own on first use
+    me_connection._connections.pop(ALIAS, None)
+    if me_connection._dbs.pop(ALIAS, None) is not None:
+        for document_cls in _get_documents_by_db(ALIAS, ALIAS):
+            if issubclass(document_cls, Document):
+                document_cls._collection = None
+    with pool_metrics._lock:
+        pool_metrics.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,28 @@
+import asyncio
+import weakref
+
+from django.conf import settings
+from mongoengine.connection import get_db
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from . import mongo, routing
+
+# Motor clients are bound to the event loop they were created on
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = AsyncIOMotorClient(settings.MONGODB_URI, io_loop=loop, **mongo.client_options())
+    return client
+
+
+def get_database():
+    # Same database mongoengine uses for the synchronous views
+    return get_client()[get_db().name]
+
+
+def collection(document_cls, kind=routing.TRANSACTIONAL):
+    return routing.route(get_database()[document_cls._get_collection_name()], kind)
@@ -0,0 +1,97 @@
+import datetime
+import logging
+import threading
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.conf import settings
+
+from . import counters, snapshots, versioning
+from .models import TrainingModule, ModuleAssignment, CollectionVersion
+
+logger = logging.getLogger('training.onboarding')
+
+
+class OnboardingTemplate:
+    """The modules every self-registered user starts with, cached per process.
+
+    ``ONBOARDING_MODULE_IDS`` pins the curriculum; otherwise it is the first
+    ``ONBOARDING_MODULE_COUNT`` active modules by id. The first
+    ``ONBOARDING_COMPLETED_COUNT`` start out completed; ids that are not valid
+    ObjectIds are skipped with a warning. The cache is reloaded when the
+    modules version stamp moves, so each signup only reads that one document.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._modules = None
+
+    def _current_version(self):
+        doc = CollectionVersion._get_collection().find_one({'_id': versioning.MODULES}, {'version': 1})
+        return (doc or {}).get('version', 0)
+
+    def _load(self):
+        collection = TrainingModule._get_collection()
+        projection = {'_id': 1, 'created_by': 1}
+        if settings.ONBOARDING_MODULE_IDS:
+            ids = []
+            for pk in settings.ONBOARDING_MODULE_IDS:
+                try:
+                    ids.append(ObjectId(pk))
+                except (InvalidId, TypeError):
+                    logger.warning('Skipping invalid ONBOARDING_MODULE_IDS entry %r', pk)
+            found = {doc['_id']: doc for doc in collection.find({'_id': {'$in': ids}, 'is_active': True}, projection)}
+            docs = [found[pk] for pk in ids if pk in found]
+        else:
+            docs = list(collection.find({'is_active': True}, projection).sort('_id', 1)
+                        .limit(settings.ONBOARDING_MODULE_COUNT))
+        return [(doc['_id'], doc.get('created_by')) for doc in docs]
+
+    def modules(self):
+        """Return [(module id, author id)] for the current curriculum."""
+        version = self._current_version()
+        with self._lock:
+            if self._modules is not None and self._version == version:
+                return self._modules
+        modules = self._load()
+        with self._lock:
+            self._version, self._modules = version, modules
+        return modules
+
+    def progress(self, modules):
+        # Counter values for a user enrolled in ``modules``
+        completed = min(settings.ONBOARDING_COMPLETED_COUNT, len(modules))
+        return {'total_assigned': len(modules), 'completed': completed}
+
+    def assign(self, user, modules):
+        """Insert the onboarding assignments for ``user`` in one write.
+
+        The user's own counters are expected to be set on creation (see
+        ``progress``). The module counters follow in one grouped bulk_write,
+        which also marks the user's dashboard row dirty, so a signup costs
+        the user insert, this insert and that counter update.
+        """
+        if not modules:
+            snapshots.mark([user.pk])
+            return
+        now = datetime.datetime.utcnow()
+        completed = settings.ONBOARDING_COMPLETED_COUNT
+        documents = [
+            {
+                'trainee': user.pk,
+                'module': module_id,
+                'assigned_by': author_id,
+                'is_completed': index < completed,
+                'assigned_at': now,
+                'completed_at': now if index < completed else None,
+            }
+            for index, (module_id, author_id) in enumerate(modules)
+        ]
+        ModuleAssignment._get_collection().insert_many(documents)
+        counters.apply(
+            [(None, doc['module'], 1, int(doc['is_completed'])) for doc in documents], dirty_trainees=[user.pk]
+        )
+
+
+onboarding_template = OnboardingTemplate()
@@ -0,0 +1,137 @@
+import base64
+import datetime
+import json
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, ObjectId):
+        return ['oid', str(value)]
+    if isinstance(value, datetime.datetime):
+        return ['dt', value.isoformat()]
+    return ['raw', value]
+
+
+def _decode_value(value):
+    kind, raw = value
+    if kind == 'oid':
+        return ObjectId(raw)
+    if kind == 'dt':
+        return datetime.datetime.fromisoformat(raw)
+    return raw
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on an indexed sort key, e.g. ``('_id',)`` or ``('-timestamp', '-_id')``.
+
+    Each page is fetched with a range condition on the last key of the previous
+    page instead of a skip, so deep pages cost the same as the first one. The
+    last field of ``ordering`` must be unique (normally ``_id``).
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=('_id',)):
+        self.ordering = ordering
+        self.max_page_size = getattr(settings, 'KEYSET_MAX_PAGE_SIZE', 500)
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, page_size))
+        except (TypeError, ValueError):
+            requested = page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position = [_decode_value(value) for value in values]
+        except (TypeError, ValueError, InvalidId):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position):
+        values = [_encode_value(value) for value in position]
+        return base64.urlsafe_b64encode(json.dumps(values).encode('ascii')).decode('ascii')
+
+    def _fields(self):
+        return [(key.lstrip('-'), key.startswith('-')) for key in self.ordering]
+
+    def _after(self, position):
+        # (a, b) > (x, y)  <=>  a > x OR (a == x AND b > y)
+        clauses = []
+        fields = self._fields()
+        for index, (field, descending) in enumerate(fields):
+            clause = {name: value for (name, _), value in zip(fields[:index], position[:index])}
+            clause[field] = {'$lt' if descending else '$gt': position[index]}
+            clauses.append(clause)
+        return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+    def _position(self, item):
+        position = []
+        for field, _ in self._fields():
+            if isinstance(item, dict):
+                position.append(item.get(field))
+            elif field == '_id':
+                position.append(item.pk)
+            else:
+                position.append(getattr(item, field))
+        return position
+
+    def prepare(self, request):
+        """Return (range filter, pymongo sort, limit) for the requested page.
+
+        Used directly by callers that query the collection themselves (the async
+        views); hand the fetched rows to ``finish``.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        query = self._after(position) if position is not None else {}
+        sort = [(field, -1 if descending else 1) for field, descending in self._fields()]
+        return query, sort, self.page_size + 1
+
+    def finish(self, rows):
+        page = list(rows)
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_cursor = self.encode_cursor(self._position(page[-1])) if self.has_next else None
+        return page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        query, _, limit = self.prepare(request)
+        if query:
+            queryset = queryset.filter(__raw__=query)
+        order_by = [('-' if descending else '') + ('id' if field == '_id' else field)
+                    for field, descending in self._fields()]
+        return self.finish(queryset.order_by(*order_by).limit(limit))
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
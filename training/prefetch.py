@@ -0,0 +1,79 @@
+from collections import defaultdict
+
+from bson import DBRef
+from mongoengine import Document
+
+
+class IdentityMap:
+    """Request-scoped cache of referenced documents, keyed by document class and id.
+
+    ``prefetch`` resolves every unresolved reference of the given fields with one
+    ``$in`` query per referenced collection and stores the loaded documents on the
+    referencing documents, so later attribute access does not hit Mongo again.
+    ``only`` maps reference fields to the document fields to load for them;
+    documents loaded that way stay partial for the rest of the request.
+    """
+
+    def __init__(self):
+        self._documents = {}
+
+    def add(self, *documents):
+        for document in documents:
+            if document is not None:
+                self._documents[(type(document), document.pk)] = document
+
+    def get(self, document_cls, pk):
+        return self._documents.get((document_cls, pk))
+
+    def load(self, document_cls, ids, only=None):
+        missing = [pk for pk in set(ids) if (document_cls, pk) not in self._documents]
+        if not missing:
+            return
+        queryset = document_cls.objects(id__in=missing)
+        if only:
+            queryset = queryset.only(*only)
+        found = {document.pk: document for document in queryset}
+        for pk in missing:
+            # Dangling references resolve to None instead of raising DoesNotExist
+            self._documents[(document_cls, pk)] = found.get(pk)
+
+    def prefetch(self, documents, *fields, only=None):
+        documents = list(documents)
+        wanted = defaultdict(set)
+        for document in documents:
+            for field in fields:
+                value = document._data.get(field)
+                if isinstance(value, DBRef):
+                    wanted[document._fields[field].document_type].add(value.id)
+                elif isinstance(value, Document):
+                    self.add(value)
+
+        # Fields referencing the same collection share one query, loading the
+        # union of their projections (or whole documents if any field needs them)
+        projections = {}
+        if documents and only:
+            for field in fields:
+                document_cls = documents[0]._fields[field].document_type
+                field_only = only.get(field)
+                if document_cls not in projections:
+                    projections[document_cls] = set(field_only) if field_only else None
+                elif projections[document_cls] is not None:
+                    projections[document_cls] = projections[document_cls] | set(field_only) if field_only else None
+
+        for document_cls, ids in wanted.items():
+            self.load(document_cls, ids, projections.get(document_cls))
+
+        for document in documents:
+            for field in fields:
+                value = document._data.get(field)
+                if isinstance(value, DBRef):
+                    document_cls = document._fields[field].document_type
+                    document._data[field] = self.get(document_cls, value.id)
+        return documents
+
+
+def identity_map(request):
+    # One map per request, shared by every serializer and view helper
+    if getattr(request, '_identity_map', None) is None:
+        request._identity_map = IdentityMap()
+    return request._identity_map
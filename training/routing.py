@@ -0,0 +1,34 @@
+from django.conf import settings
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+# Query kinds. Transactional reads (anything a user may have just written,
+# e.g. their own assignments after marking one complete) stay on the primary;
+# analytic reads (dashboards, exports) may be served by a secondary.
+TRANSACTIONAL = 'transactional'
+ANALYTIC = 'analytic'
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest,
+}
+
+
+def read_preference(kind):
+    if kind != ANALYTIC:
+        return Primary()
+    mode = READ_PREFERENCES[settings.ANALYTICS_READ_PREFERENCE]
+    if mode is Primary:
+        return Primary()
+    return mode(max_staleness=settings.ANALYTICS_MAX_STALENESS_SECONDS)
+
+
+def route(collection, kind):
+    """``collection`` (pymongo or Motor) with the read preference for ``kind``."""
+    return collection.with_options(read_preference=read_preference(kind))
+
+
+def collection(document_cls, kind=TRANSACTIONAL):
+    return route(document_cls._get_collection(), kind)
@@ -0,0 +1,225 @@
+import concurrent.futures
+import datetime
+import math
+import multiprocessing
+import random
+import struct
+
+from bson import ObjectId
+from django.conf import settings
+from mongoengine.connection import get_db
+from pymongo import MongoClient
+
+from . import mongo
+from .hashing import password_hasher
+from .models import User, TrainingModule, ModuleAssignment, Message
+from .search import grams
+
+BATCH_SIZE = 1000
+# Trainees / messages generated per worker task; fixed so output doesn't depend on the worker count
+TRAINEE_CHUNK = 2000
+MESSAGE_CHUNK = 20000
+SAMPLE_PASSWORD = 'samplepassword'
+
+INSTRUCTOR, TRAINEE, MODULE, ASSIGNMENT, MESSAGE = range(1, 6)
+LOREM = 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. '
+
+_client = None
+
+
+def object_id(kind, index, now):
+    # Deterministic per (kind, index) within a run, so workers can reference
+    # users and modules they did not create
+    return ObjectId(struct.pack('>IB', int(now.replace(tzinfo=datetime.timezone.utc).timestamp()), kind) + index.to_bytes(7, 'big'))
+
+
+def _skewed(rng, size):
+    # Log-uniform index in [0, size): low indices are drawn far more often
+    return min(size - 1, int(size ** rng.random()) - 1)
+
+
+def _collection(target, name):
+    # target is None in-process (mongoengine connection), else (uri, database) in a worker
+    global _client
+    if target is None:
+        return get_db()[name]
+    if _client is None:
+        _client = MongoClient(target[0], **mongo.client_options())
+    return _client[target[1]][name]
+
+
+def _insert(collection, documents, batch_size=BATCH_SIZE):
+    for start in range(0, len(documents), batch_size):
+        collection.insert_many(documents[start:start + batch_size], ordered=False)
+
+
+def _user(role, kind, index, password, now):
+    return {
+        '_id': object_id(kind, index, now),
+        'username': f'{role}{index}',
+        'email': f'{role}{index}@example.com',
+        'password': password,
+        'role': role,
+        'is_active': True,
+        'first_name': role.title(),
+        'last_name': str(index),
+        'created_at': now,
+        'updated_at': now,
+        'total_assigned': 0,
+        'completed': 0,
+    }
+
+
+def _plan(modules, instructors, random_seed):
+    # Per-module author and how likely trainees are to finish it
+    rng = random.Random(f'{random_seed}:modules')
+    return [(rng.randrange(instructors), rng.uniform(0.2, 0.95)) for _ in range(modules)]
+
+
+def _trainee_chunk(target, names, chunk, trainees, assignments_per_trainee, plan, password, now, random_seed):
+    """Insert one chunk of trainees with their assignments.
+
+    Assignment counts per trainee are exponential around the requested mean
+    and popular modules are picked far more often. Returns per-module
+    assigned/completed counts.
+    """
+    rng = random.Random(f'{random_seed}:trainees:{chunk}')
+    modules = len(plan)
+    assigned = [0] * modules
+    completed = [0] * modules
+    users, assignments = [], []
+    for index in range(chunk * TRAINEE_CHUNK, min(trainees, (chunk + 1) * TRAINEE_CHUNK)):
+        user = _user('trainee', TRAINEE, index, password, now)
+        diligence = rng.betavariate(2, 1.5)
+        count = min(modules, max(1, round(rng.expovariate(1 / assignments_per_trainee)))) if modules else 0
+        picked = set(rng.sample(range(modules), count)) if count > modules // 2 else set()
+        while len(picked) < count:
+            picked.add(_skewed(rng, modules))
+        for position, module in enumerate(sorted(picked)):
+            author, ease = plan[module]
+            assigned_at = now - datetime.timedelta(days=min(365, rng.expovariate(1 / 30)))
+            is_completed = rng.random() < ease * diligence
+            completed_at = min(now, assigned_at + datetime.timedelta(days=rng.expovariate(1 / 7))) if is_completed else None
+            assignments.append({
+                '_id': object_id(ASSIGNMENT, index * modules + position, now),
+                'trainee': user['_id'],
+                'module': object_id(MODULE, module, now),
+                'assigned_by': object_id(INSTRUCTOR, author, now),
+                'is_completed': is_completed,
+                'assigned_at': assigned_at,
+                'completed_at': completed_at,
+            })
+            assigned[module] += 1
+            user['total_assigned'] += 1
+            if is_completed:
+                completed[module] += 1
+                user['completed'] += 1
+        users.append(user)
+    _insert(_collection(target, names['user']), users)
+    _insert(_collection(target, names['assignment']), assignments)
+    return assigned, completed
+
+
+def _message_chunk(target, names, chunk, messages, trainees, instructors, now, random_seed):
+    """Insert one chunk of messages; a few trainees write most of them."""
+    rng = random.Random(f'{random_seed}:messages:{chunk}')
+    instructor_ids = [object_id(INSTRUCTOR, index, now) for index in range(instructors)]
+    documents = []
+    for index in range(chunk * MESSAGE_CHUNK, min(messages, (chunk + 1) * MESSAGE_CHUNK)):
+        trainee = object_id(TRAINEE, _skewed(rng, trainees), now)
+        timestamp = now - datetime.timedelta(days=min(90, rng.expovariate(1 / 14)))
+        content = LOREM[:rng.randint(10, len(LOREM))] * max(1, int(rng.lognormvariate(0, 1)))
+        document = {'_id': object_id(MESSAGE, index, now), 'content': content, 'timestamp': timestamp}
+        if rng.random() < 0.6:
+            # Broadcast from a trainee to every instructor
+            document.update(sender=trainee, recipients=instructor_ids)
+        else:
+            document.update(sender=rng.choice(instructor_ids), recipient=trainee)
+        documents.append(document)
+    _insert(_collection(target, names['message']), documents)
+    return len(documents)
+
+
+def seed(trainees=100, instructors=5, modules=20, assignments_per_trainee=5, messages=200, random_seed=0,
+         workers=0, progress=None):
+    """Insert a deterministic, skewed dataset with batched raw inserts and return its ids.
+
+    Document contents depend only on the arguments and ``random_seed``; ids
+    and dates are relative to the time of the run. ``workers`` > 0 spreads
+    trainee and message chunks over that many processes. Every user gets
+    ``SAMPLE_PASSWORD`` and progress counters are filled in as data is
+    written. Meant for an empty database: usernames are ``trainee<n>`` and
+    ``instructor<n>``.
+    """
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+    password = password_hasher.hash(SAMPLE_PASSWORD)
+    instructors = max(1, instructors)
+    plan = _plan(modules, instructors, random_seed)
+    names = {
+        'user': User._get_collection_name(),
+        'module': TrainingModule._get_collection_name(),
+        'assignment': ModuleAssignment._get_collection_name(),
+        'message': Message._get_collection_name(),
+    }
+    report = progress or (lambda message: None)
+
+    _insert(_collection(None, names['user']),
+            [_user('instructor', INSTRUCTOR, index, password, now) for index in range(instructors)])
+
+    tasks = [(_trainee_chunk, (names, chunk, trainees, assignments_per_trainee, plan, password, now, random_seed))
+             for chunk in range(math.ceil(trainees / TRAINEE_CHUNK))]
+    tasks += [(_message_chunk, (names, chunk, messages, trainees, instructors, now, random_seed))
+              for chunk in range(math.ceil(messages / MESSAGE_CHUNK) if trainees else 0)]
+
+    assigned = [0] * modules
+    completed = [0] * modules
+    totals = {'assignments': 0, 'messages': 0}
+
+    def collect(function, args, result):
+        if function is _trainee_chunk:
+            for module in range(modules):
+                assigned[module] += result[0][module]
+                completed[module] += result[1][module]
+            totals['assignments'] += sum(result[0])
+            report(f'Trainee chunk {args[1] + 1} written.')
+        else:
+            totals['messages'] += result
+            report(f'Message chunk {args[1] + 1} written.')
+
+    if workers:
+        target = (settings.MONGODB_URI, get_db().name)
+        context = multiprocessing.get_context('spawn')
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context) as pool:
+            futures = {pool.submit(function, target, *args): (function, args) for function, args in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                collect(*futures[future], future.result())
+    else:
+        for function, args in tasks:
+            collect(function, args, function(None, *args))
+
+    rng = random.Random(f'{random_seed}:content')
+    module_docs = []
+    for index, (author, _) in enumerate(plan):
+        module_docs.append({
+            '_id': object_id(MODULE, index, now),
+            'title': f'Module {index}',
+            'search_grams': grams(f'Module {index}'),
+            'description': f'Sample module {index}',
+            'content': LOREM * max(1, int(rng.lognormvariate(4, 1))),
+            'duration_minutes': rng.choice([15, 30, 45, 60, 90]),
+            'is_active': rng.random() < 0.95,
+            'created_by': object_id(INSTRUCTOR, author, now),
+            'created_at': now,
+            'updated_at': now,
+            'assigned_count': assigned[index],
+            'completed_count': completed[index],
+        })
+    _insert(_collection(None, names['module']), module_docs)
+
+    return {
+        'instructors': [object_id(INSTRUCTOR, index, now) for index in range(instructors)],
+        'trainees': [object_id(TRAINEE, index, now) for index in range(trainees)],
+        'modules': [document['_id'] for document in module_docs],
+        'assignments': totals['assignments'],
+        'messages': totals['messages'],
+    }
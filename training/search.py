@@ -0,0 +1,75 @@
+"""Module search: ranked full-text results and typo-tolerant title suggestions.
+
+Results come from the weighted ``module_text`` index. Suggestions match title
+trigrams (``TrainingModule.search_grams``), padded like PostgreSQL's pg_trgm
+so that a half-typed or misspelled word still shares most of its trigrams
+with the title word it is meant to be.
+"""
+import re
+
+from .models import TrainingModule
+
+WORD = re.compile(r'\w+')
+SUGGEST_LIMIT = 10
+# Share of the query's trigrams a title must contain to be suggested
+SUGGEST_MIN_SIMILARITY = 0.5
+
+
+def grams(text, partial=False):
+    """Sorted trigrams of the words in ``text``.
+
+    With ``partial`` the last word is taken to be still being typed, so it gets
+    no end padding and matches any word it is a prefix of.
+    """
+    words = WORD.findall((text or '').lower())
+    result = set()
+    for index, word in enumerate(words):
+        padded = '  ' + word + ('' if partial and index == len(words) - 1 else ' ')
+        result.update(padded[start:start + 3] for start in range(len(padded) - 2))
+    return sorted(result)
+
+
+def _projection(fields):
+    return dict.fromkeys(('_id' if field == 'id' else field for field in fields), 1)
+
+
+def search(query, after, limit, fields):
+    """Active modules matching ``query``, best first, as raw documents with a ``score``.
+
+    ``after`` is the keyset range filter on ``(score, _id)`` from
+    ``KeysetPagination.prepare``.
+    """
+    pipeline = [
+        {'$match': {'$text': {'$search': query}, 'is_active': True}},
+        {'$project': dict(_projection(fields), score={'$meta': 'textScore'})},
+    ]
+    if after:
+        pipeline.append({'$match': after})
+    pipeline += [
+        {'$sort': {'score': -1, '_id': 1}},
+        {'$limit': limit},
+    ]
+    return TrainingModule._get_collection().aggregate(pipeline)
+
+
+def suggest(query, limit=SUGGEST_LIMIT):
+    """Titles of active modules similar to what has been typed so far, best first."""
+    wanted = grams(query, partial=True)
+    if not wanted:
+        return []
+    rows = TrainingModule._get_collection().aggregate([
+        {'$match': {'search_grams': {'$in': wanted}, 'is_active': True}},
+        {'$project': {
+            'title': 1,
+            'hits': {'$size': {'$setIntersection': ['$search_grams', wanted]}},
+            'length': {'$strLenCP': '$title'},
+        }},
+        {'$match': {'hits': {'$gte': max(1, round(len(wanted) * SUGGEST_MIN_SIMILARITY))}}},
+        # Among equally close titles the shortest is the likeliest completion
+        {'$sort': {'hits': -1, 'length': 1, '_id': 1}},
+        {'$limit': limit},
+    ])
+    return [
+        {'id': str(row['_id']), 'title': row['title'], 'similarity': round(row['hits'] / len(wanted), 2)}
+        for row in rows
+    ]
@@ -1,9 +1,56 @@
 from rest_framework import serializers
-from passlib.hash import pbkdf2_sha256
-from .models import User, TrainingModule, ModuleAssignment, Message
+from .models import User, TrainingModule, ModuleAssignment
+from .prefetch import IdentityMap
+from . import fieldsets
+from .hashing import password_hasher
+from .user_cache import user_cache
 import datetime
 
-class UserSerializer(serializers.Serializer):
+class PrefetchListSerializer(serializers.ListSerializer):
+    # Resolves the child's selected reference fields in bulk, loading only the
+    # selected fields of the referenced documents, before serializing each item
+    def to_representation(self, data):
+        identity_map = self.context.get('identity_map') or IdentityMap()
+        selection = self.child.selection
+        fields = [field for field in self.child.prefetch_fields if field in selection]
+        only = fieldsets.related_projections(type(self.child), selection)
+        data = identity_map.prefetch(data, *fields, only=only)
+        return super().to_representation(data)
+
+class SparseSerializer(serializers.Serializer):
+    """Serializer whose output can be narrowed with a selection from ``training.fieldsets``.
+
+    Pass ``fields=fieldsets.select(request, SerializerClass)``; without it every
+    field is returned. ``summary_fields`` is the default for list endpoints and
+    ``nested_serializers`` maps reference fields to (serializer, default fields).
+    """
+    summary_fields = None
+    nested_serializers = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        self._selection = fields
+        super().__init__(*args, **kwargs)
+
+    @property
+    def selection(self):
+        if self._selection is None:
+            self._selection = fieldsets.resolve(type(self), summary=False)
+        return self._selection
+
+    def nested(self, obj, field):
+        # Only dereferences fields that were selected
+        if field not in self.selection:
+            return None
+        value = getattr(obj, field, None)
+        if value is None:
+            return None
+        serializer_cls = self.nested_serializers[field][0]
+        return serializer_cls(value, fields=self.selection[field]).data
+
+    def pick(self, data):
+        return {field: data[field] for field in self.selection}
+
+class UserSerializer(SparseSerializer):
     id = serializers.CharField(read_only=True)
     username = serializers.CharField()
     first_name = serializers.CharField(allow_blank=True, required=False)
@@ -14,7 +61,7 @@ class UserSerializer(serializers.Serializer):
     created_at = serializers.DateTimeField(required=False, allow_null=True)
 
     def to_representation(self, obj):
-        return {
+        return self.pick({
             'id': str(obj.id),
             'username': obj.username,
             'first_name': getattr(obj, 'first_name', '') or '',
@@ -23,7 +70,7 @@ class UserSerializer(serializers.Serializer):
             'role': obj.role,
             'is_active': obj.is_active,
             'created_at': obj.created_at.isoformat() if getattr(obj, 'created_at', None) else datetime.datetime.utcnow().isoformat(),
-        }
+        })
 
 class UserCreateSerializer(serializers.Serializer):
     username = serializers.CharField()
@@ -41,7 +88,7 @@ class UserCreateSerializer(serializers.Serializer):
         return data
 
     def create(self, validated_data):
-        hashed_password = pbkdf2_sha256.hash(validated_data['password'])
+        hashed_password = password_hasher.hash(validated_data['password'])
         user = User(
             username=validated_data['username'],
             email=validated_data['email'],
@@ -49,7 +96,9 @@ class UserCreateSerializer(serializers.Serializer):
             role=validated_data.get('role', 'trainee'),
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', ''),
-            is_active=True
+            is_active=True,
+            total_assigned=validated_data.get('total_assigned', 0),
+            completed=validated_data.get('completed', 0),
         )
         user.save()
         return user
@@ -82,14 +131,20 @@ class LoginSerializer(serializers.Serializer):
         user = User.objects(username=username).first()
         if not user:
             raise serializers.ValidationError('Invalid credentials')
-        if not pbkdf2_sha256.verify(password, user.password):
+        valid, new_hash = password_hasher.verify(password, user.password)
+        if not valid:
             raise serializers.ValidationError('Invalid credentials')
+        if new_hash:
+            # Upgrade hashes made with older parameters; guarded on the old value
+            # so a concurrent password change wins
+            User.objects(id=user.id, password=user.password).update_one(set__password=new_hash)
+            user_cache.invalidate(user.id)
         if not user.is_active:
             raise serializers.ValidationError('User account is disabled')
         attrs['user'] = user
         return attrs
 
-class TrainingModuleSerializer(serializers.Serializer):
+class TrainingModuleSerializer(SparseSerializer):
     id = serializers.CharField(read_only=True)
     title = serializers.CharField()
     description = serializers.CharField(allow_blank=True, required=False)
@@ -100,8 +155,11 @@ class TrainingModuleSerializer(serializers.Serializer):
     updated_at = serializers.DateTimeField(required=False, allow_null=True)
     # Add other fields as needed
 
+    # Lists leave out the module body; ask for it with ?fields= or the detail endpoint
+    summary_fields = ('id', 'title', 'description', 'duration_minutes', 'is_active', 'created_at', 'updated_at')
+
     def to_representation(self, obj):
-        return {
+        return self.pick({
             'id': str(obj.id),
             'title': obj.title,
             'description': getattr(obj, 'description', '') or '',
@@ -110,14 +168,17 @@ class TrainingModuleSerializer(serializers.Serializer):
             'is_active': getattr(obj, 'is_active', True),
             'created_at': obj.created_at.isoformat() if getattr(obj, 'created_at', None) else None,
             'updated_at': obj.updated_at.isoformat() if getattr(obj, 'updated_at', None) else None,
-        }
+        })
 
 class TrainingModuleCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrainingModule
         fields = ['title', 'description', 'content', 'duration_minutes']
 
-class ModuleAssignmentSerializer(serializers.Serializer):
+# Default fields of users nested in assignments
+USER_REFERENCE_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+class ModuleAssignmentSerializer(SparseSerializer):
     id = serializers.CharField(read_only=True)
     trainee = UserSerializer(read_only=True)
     module = TrainingModuleSerializer(read_only=True)
@@ -126,16 +187,26 @@ class ModuleAssignmentSerializer(serializers.Serializer):
     completed_at = serializers.DateTimeField(required=False, allow_null=True)
     assigned_at = serializers.DateTimeField(required=False, allow_null=True)
 
+    prefetch_fields = ('trainee', 'module', 'assigned_by')
+    nested_serializers = {
+        'trainee': (UserSerializer, USER_REFERENCE_FIELDS),
+        'module': (TrainingModuleSerializer, None),
+        'assigned_by': (UserSerializer, USER_REFERENCE_FIELDS),
+    }
+
+    class Meta:
+        list_serializer_class = PrefetchListSerializer
+
     def to_representation(self, obj):
-        return {
+        return self.pick({
             'id': str(obj.id),
-            'trainee': UserSerializer(obj.trainee).data if obj.trainee else None,
-            'module': TrainingModuleSerializer(obj.module).data if obj.module else None,
-            'assigned_by': UserSerializer(obj.assigned_by).data if obj.assigned_by else None,
+            'trainee': self.nested(obj, 'trainee'),
+            'module': self.nested(obj, 'module'),
+            'assigned_by': self.nested(obj, 'assigned_by'),
             'is_completed': obj.is_completed,
             'completed_at': obj.completed_at.isoformat() if getattr(obj, 'completed_at', None) else None,
             'assigned_at': obj.assigned_at.isoformat() if getattr(obj, 'assigned_at', None) else None,
-        }
+        })
 
 class ModuleAssignmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -159,11 +230,31 @@ class InstructorDashboardSerializer(serializers.Serializer):
     trainees = UserSerializer(many=True)
     modules = TrainingModuleSerializer(many=True) 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(serializers.Serializer):
+    id = serializers.CharField(read_only=True)
     sender = UserSerializer(read_only=True)
     recipient = UserSerializer(read_only=True)
+    content = serializers.CharField()
+    timestamp = serializers.DateTimeField(read_only=True)
 
-    class Meta:
-        model = Message
-        fields = ['id', 'sender', 'recipient', 'content', 'timestamp']
-        read_only_fields = ['id', 'sender', 'recipient', 'timestamp'] 
\ No newline at end of file
+    def to_representation(self, obj):
+        return {
+            'id': str(obj.id),
+            'sender': UserSerializer(obj.sender).data if obj.sender else None,
+            'recipient': UserSerializer(obj.recipient).data if obj.recipient else None,
+            'content': obj.content,
+            'timestamp': obj.timestamp.isoformat() if obj.timestamp else None,
+        } 
+
+# The recipient shown to whoever sent a broadcast, which has no single recipient
+BROADCAST_RECIPIENT = {'id': None, 'username': 'instructors', 'role': 'instructor'}
+
+
+def broadcast_recipient(recipient_ids, sender_id, viewer_id, viewer):
+    """The ``recipient`` of a broadcast as listed for the user ``viewer_id``.
+
+    A user it was sent to sees themselves (``viewer``, their summary); its
+    sender sees ``BROADCAST_RECIPIENT``.
+    """
+    received = viewer_id in {getattr(value, 'id', value) for value in recipient_ids}
+    return viewer if received and viewer_id != sender_id else BROADCAST_RECIPIENT
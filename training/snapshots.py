@@ -0,0 +1,309 @@
+import datetime
+import time
+from collections import Counter
+
+from django.conf import settings
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from . import jobs
+from .aggregations import (
+    IN_PROGRESS_QUERY, MODULE_STATS_FIELDS, PROGRESS_BUCKETS, TRAINEE_STATS_QUERY,
+    module_stats_rows, trainee_stats_rows,
+)
+from .models import (
+    DashboardDirtyRow, DashboardSnapshot, DashboardSnapshotRow, Job, ModuleAssignment, TrainingModule, User,
+)
+from .pagination import KeysetPagination
+from .routing import ANALYTIC, collection
+
+INSTRUCTOR = 'instructor'
+REFRESH = 'refresh_dashboard_snapshot'
+TRAINEE = 'trainee'
+MODULE = 'module'
+TRAINEE_ROW_FIELDS = {'username': 1, 'email': 1, 'created_at': 1, 'total_assigned': 1, 'completed': 1}
+# Row documents written per bulk_write
+ROW_BATCH_SIZE = 1000
+# Totals kept on the snapshot document, besides progress_distribution
+TOTALS = ('total_trainees', 'total_modules', 'assigned_modules_count', 'assigned_total', 'completed_total')
+# A patch or refresh holds the snapshot for this long at a time, so one that dies is taken over
+LEASE_SECONDS = 60
+TOP_TRAINEES = 5
+
+
+def _collection():
+    return DashboardSnapshot._get_collection()
+
+
+def _rows():
+    return DashboardSnapshotRow._get_collection()
+
+
+def _dirty():
+    return DashboardDirtyRow._get_collection()
+
+
+def _trainee_row(doc):
+    total_assigned = doc.get('total_assigned') or 0
+    completion = round((doc.get('completed') or 0) / total_assigned * 100) if total_assigned > 0 else 0
+    trainees, _ = trainee_stats_rows({'trainees': [dict(doc, completion_percentage=completion)], 'distribution': []})
+    return trainees[0]
+
+
+def _totals(kind, row):
+    # What one row adds to the snapshot's totals, as $inc fields
+    if row is None:
+        return {}
+    if kind == TRAINEE:
+        bucket = max(bucket for bucket in PROGRESS_BUCKETS if bucket <= row['completion_percentage'])
+        return {'total_trainees': 1, f'progress_distribution.{bucket}': 1}
+    return {
+        'total_modules': 1,
+        'assigned_modules_count': int(row['assigned_count'] > 0),
+        'assigned_total': row['assigned_count'],
+        'completed_total': row['completed_count'],
+    }
+
+
+def _lease(now):
+    """Take the snapshot for a patch or refresh and return its state, or None while another holds it.
+
+    Patches turn row changes into increments of the stored totals, so two must
+    not work from the same old rows at once.
+    """
+    try:
+        return _collection().find_one_and_update(
+            {'_id': INSTRUCTOR, 'leased_until': {'$not': {'$gt': now}}},
+            {'$set': {'leased_until': now + datetime.timedelta(seconds=LEASE_SECONDS)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        return None
+
+
+def _write_rows(operations, renew_lease=False):
+    def flush(batch):
+        _rows().bulk_write(batch, ordered=False)
+        if renew_lease:
+            lease_until = datetime.datetime.utcnow() + datetime.timedelta(seconds=LEASE_SECONDS)
+            _collection().update_one({'_id': INSTRUCTOR}, {'$set': {'leased_until': lease_until}})
+
+    batch = []
+    for operation in operations:
+        batch.append(operation)
+        if len(batch) >= ROW_BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+
+def _replace(kind, entity, row, now):
+    return ReplaceOne({'_id': entity}, {'kind': kind, 'row': row, 'refreshed_at': now}, upsert=True)
+
+
+def refresh():
+    """Recompute every dashboard row and the snapshot's totals."""
+    while _lease(datetime.datetime.utcnow()) is None:
+        # Patches hold the snapshot for well under a second
+        time.sleep(0.1)
+    generated_at = datetime.datetime.utcnow()
+    totals = Counter()
+
+    def replaced(kind, rows):
+        for entity, row in rows:
+            totals.update(_totals(kind, row))
+            yield _replace(kind, entity, row, generated_at)
+
+    modules = collection(TrainingModule, ANALYTIC).find({}, dict.fromkeys(MODULE_STATS_FIELDS, 1))
+    _write_rows(replaced(MODULE, ((doc['_id'], module_stats_rows([doc])[0]) for doc in modules)), renew_lease=True)
+    # Streamed one row document per trainee, so no single document grows with the trainee count
+    trainees = collection(User, ANALYTIC).find(TRAINEE_STATS_QUERY, TRAINEE_ROW_FIELDS, batch_size=ROW_BATCH_SIZE)
+    _write_rows(replaced(TRAINEE, ((doc['_id'], _trainee_row(doc)) for doc in trainees)), renew_lease=True)
+    # Rows of trainees and modules that are gone
+    _rows().delete_many({'refreshed_at': {'$lt': generated_at}})
+    # Rows marked dirty while computing stay dirty and are patched on the next read
+    _dirty().delete_many({'marked_at': {'$lt': generated_at}})
+    in_progress = collection(ModuleAssignment, ANALYTIC).count_documents(IN_PROGRESS_QUERY)
+    _collection().update_one(
+        {'_id': INSTRUCTOR},
+        {'$set': dict(
+            {name: totals[name] for name in TOTALS},
+            progress_distribution={str(bucket): totals[f'progress_distribution.{bucket}'] for bucket in PROGRESS_BUCKETS},
+            generated_at=generated_at, patched_at=None, in_progress=in_progress, needs_refresh=False,
+            leased_until=None,
+        )},
+    )
+    return generated_at
+
+
+@jobs.handler(REFRESH)
+def run_refresh(params, report):
+    return {'generated_at': refresh().isoformat()}
+
+
+def _schedule_refresh():
+    # At most one refresh waiting or running at a time
+    if not Job.objects(kind=REFRESH, status__in=('queued', 'running')).count():
+        jobs.enqueue(REFRESH, {})
+
+
+@jobs.periodic
+def schedule_refresh():
+    """Queue a refresh once the snapshot is ``DASHBOARD_SNAPSHOT_INTERVAL`` seconds old or flagged.
+
+    Called on every job monitor and ``run_jobs`` check; whichever process
+    finds it due first queues the refresh.
+    """
+    now = datetime.datetime.utcnow()
+    due = now - datetime.timedelta(seconds=settings.DASHBOARD_SNAPSHOT_INTERVAL)
+    claimed = _collection().update_one(
+        {'_id': INSTRUCTOR, '$or': [{'generated_at': {'$lt': due}}, {'needs_refresh': True}],
+         'refresh_requested_at': {'$not': {'$gt': due}}},
+        {'$set': {'refresh_requested_at': now}},
+    )
+    if claimed.modified_count:
+        _schedule_refresh()
+
+
+def mark(trainee_ids=(), module_ids=()):
+    """Record trainees and modules whose dashboard rows changed, one marker document each."""
+    now = datetime.datetime.utcnow()
+    operations = [
+        UpdateOne({'_id': pk}, {'$set': {'kind': kind, 'marked_at': now}}, upsert=True)
+        for kind, ids in ((TRAINEE, trainee_ids), (MODULE, module_ids))
+        for pk in ids
+    ]
+    if operations:
+        _dirty().bulk_write(operations, ordered=False)
+
+
+def invalidate():
+    """Flag the snapshot for a full refresh, for changes too broad to patch row by row."""
+    _collection().update_one({'_id': INSTRUCTOR}, {'$set': {'needs_refresh': True}})
+
+
+def _patch(trainee_ids, module_ids, now):
+    """Replace the given rows where they are and return the resulting change to the totals."""
+    previous = {doc['_id']: doc['row'] for doc in _rows().find({'_id': {'$in': trainee_ids + module_ids}}, {'row': 1})}
+    delta = Counter()
+    operations = []
+
+    def replace(kind, entity, row):
+        delta.update(_totals(kind, row))
+        delta.subtract(_totals(kind, previous.get(entity)))
+        operations.append(_replace(kind, entity, row, now) if row is not None else DeleteOne({'_id': entity}))
+
+    if module_ids:
+        docs = {doc['_id']: doc for doc in TrainingModule._get_collection().find(
+            {'_id': {'$in': module_ids}}, dict.fromkeys(MODULE_STATS_FIELDS, 1))}
+        for module_id in module_ids:
+            replace(MODULE, module_id, module_stats_rows([docs[module_id]])[0] if module_id in docs else None)
+    if trainee_ids:
+        docs = {doc['_id']: doc for doc in User._get_collection().find(
+            dict(TRAINEE_STATS_QUERY, _id={'$in': trainee_ids}), TRAINEE_ROW_FIELDS)}
+        for trainee_id in trainee_ids:
+            replace(TRAINEE, trainee_id, _trainee_row(docs[trainee_id]) if trainee_id in docs else None)
+    _write_rows(operations)
+    return {name: value for name, value in delta.items() if value}
+
+
+def _patch_dirty(markers):
+    # Returns the patched snapshot state, or None when a refresh or another patch holds it
+    now = datetime.datetime.utcnow()
+    if _lease(now) is None:
+        return None
+    delta = _patch(
+        [marker['_id'] for marker in markers if marker['kind'] == TRAINEE],
+        [marker['_id'] for marker in markers if marker['kind'] == MODULE],
+        now,
+    )
+    update = {'$set': {'patched_at': now, 'leased_until': None}}
+    if delta:
+        update['$inc'] = delta
+    snapshot = _collection().find_one_and_update({'_id': INSTRUCTOR}, update, return_document=ReturnDocument.AFTER)
+    # A row marked again while it was being patched keeps its newer marker
+    _dirty().bulk_write(
+        [DeleteOne({'_id': marker['_id'], 'marked_at': marker['marked_at']}) for marker in markers],
+        ordered=False,
+    )
+    return snapshot
+
+
+def current():
+    """Return the snapshot state document with dirty rows patched in.
+
+    The snapshot is built on first use. Its totals and rows are stored, so
+    reading it costs the same whatever the number of trainees and modules;
+    ``schedule_refresh`` keeps it fresh in the background.
+    """
+    snapshot = _collection().find_one({'_id': INSTRUCTOR})
+    if snapshot is None or not snapshot.get('generated_at'):
+        refresh()
+        snapshot = _collection().find_one({'_id': INSTRUCTOR})
+
+    limit = settings.DASHBOARD_SNAPSHOT_MAX_DIRTY
+    markers = list(_dirty().find({}, {'kind': 1, 'marked_at': 1}).sort('marked_at', 1).limit(limit + 1))
+    if len(markers) > limit:
+        # Past the limit patching costs about as much as a refresh, so patch the
+        # oldest rows and ask for one
+        markers = markers[:limit]
+        _schedule_refresh()
+    elif snapshot.get('needs_refresh'):
+        _schedule_refresh()
+    if markers:
+        snapshot = _patch_dirty(markers) or snapshot
+    return snapshot
+
+
+def summary(snapshot):
+    """The dashboard totals stored on ``snapshot``."""
+    total_modules = snapshot.get('total_modules') or 0
+    assigned = snapshot.get('assigned_modules_count') or 0
+    total = snapshot.get('assigned_total') or 0
+    completed = snapshot.get('completed_total') or 0
+    # in_progress keeps the value computed by the last refresh
+    in_progress = snapshot.get('in_progress') or 0
+    distribution = snapshot.get('progress_distribution') or {}
+    return {
+        'total_trainees': snapshot.get('total_trainees') or 0,
+        'total_modules': total_modules,
+        'assigned_modules_count': assigned,
+        'unassigned_modules_count': total_modules - assigned,
+        'progress_distribution': {bucket: distribution.get(str(bucket), 0) for bucket in PROGRESS_BUCKETS},
+        'assignment_status_summary': {
+            'completed': completed,
+            'in_progress': in_progress,
+            'not_started': total - completed - in_progress,
+            'total': total,
+        },
+    }
+
+
+def rows(kind, query, sort, limit):
+    """Row documents of one kind for ``KeysetPagination``, which orders them by ``_id``."""
+    return _rows().find(dict(query, kind=kind), {'row': 1}).sort(sort).limit(limit)
+
+
+def dashboard(page_size):
+    """The instructor dashboard: stored totals, the first ``page_size`` trainee and module rows and the top trainees.
+
+    ``trainees_next_cursor`` and ``modules_next_cursor`` continue the lists
+    through the row endpoints.
+    """
+    snapshot = current()
+    data = summary(snapshot)
+    paginator = KeysetPagination()
+    for kind, key in ((TRAINEE, 'trainees'), (MODULE, 'modules')):
+        page = list(rows(kind, {}, [('_id', 1)], page_size + 1))
+        data[key] = [doc['row'] for doc in page[:page_size]]
+        data[f'{key}_next_cursor'] = (
+            paginator.encode_cursor([page[page_size - 1]['_id']]) if len(page) > page_size else None
+        )
+    top = _rows().find({'kind': TRAINEE}, {'row': 1}).sort([('row.completion_percentage', -1), ('_id', 1)])
+    data['top_trainees'] = [doc['row'] for doc in top.limit(TOP_TRAINEES)]
+    patched_at = snapshot.get('patched_at')
+    data['generated_at'] = snapshot['generated_at'].isoformat()
+    data['patched_at'] = patched_at.isoformat() if patched_at else None
+    return data
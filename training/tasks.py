@@ -0,0 +1,25 @@
+import io
+
+from django.core.management import call_command
+
+from . import jobs
+from .assignments import bulk_assign
+from .models import User
+
+BULK_ASSIGN = 'bulk_assign'
+REBUILD_PROGRESS_COUNTERS = 'rebuild_progress_counters'
+
+
+@jobs.handler(BULK_ASSIGN)
+def run_bulk_assign(params, report):
+    assigned_by = User.objects(id=params['assigned_by']).first()
+    if assigned_by is None:
+        raise ValueError('The assigning instructor no longer exists.')
+    return bulk_assign(params['trainee_ids'], params['module_ids'], assigned_by, report)
+
+
+@jobs.handler(REBUILD_PROGRESS_COUNTERS)
+def run_rebuild_progress_counters(params, report):
+    output = io.StringIO()
+    call_command('rebuild_progress_counters', stdout=output)
+    return {'output': output.getvalue().strip().splitlines()}
@@ -0,0 +1,84 @@
+import datetime
+
+from bson import ObjectId
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+
+from training import fieldsets
+from training.models import ModuleAssignment, TrainingModule, User
+from training.serializers import ModuleAssignmentSerializer, TrainingModuleSerializer, USER_REFERENCE_FIELDS
+
+
+class ResolveTests(SimpleTestCase):
+    def test_summary_by_default(self):
+        selection = fieldsets.resolve(TrainingModuleSerializer)
+        self.assertEqual(set(selection), set(TrainingModuleSerializer.summary_fields))
+        self.assertNotIn('content', selection)
+
+    def test_every_field_without_summary(self):
+        selection = fieldsets.resolve(TrainingModuleSerializer, summary=False)
+        self.assertEqual(list(selection), list(TrainingModuleSerializer._declared_fields))
+
+    def test_requested_fields_keep_id(self):
+        selection = fieldsets.resolve(TrainingModuleSerializer, fieldsets._tree('title,content'))
+        self.assertEqual(selection, {'id': None, 'title': None, 'content': None})
+
+    def test_excluded_fields(self):
+        selection = fieldsets.resolve(TrainingModuleSerializer, excluded=fieldsets._tree('description,id'))
+        self.assertNotIn('description', selection)
+        self.assertIn('id', selection)
+
+    def test_nested_defaults_and_requests(self):
+        selection = fieldsets.resolve(ModuleAssignmentSerializer)
+        self.assertEqual(set(selection['trainee']), set(USER_REFERENCE_FIELDS))
+        self.assertNotIn('content', selection['module'])
+
+        selection = fieldsets.resolve(ModuleAssignmentSerializer, fieldsets._tree('is_completed,module.content'))
+        self.assertEqual(selection, {'id': None, 'module': {'id': None, 'content': None}, 'is_completed': None})
+
+    def test_nested_exclude(self):
+        selection = fieldsets.resolve(ModuleAssignmentSerializer, excluded=fieldsets._tree('module.description'))
+        self.assertIn('module', selection)
+        self.assertNotIn('description', selection['module'])
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValidationError):
+            fieldsets.resolve(TrainingModuleSerializer, fieldsets._tree('title,secret'))
+        with self.assertRaises(ValidationError):
+            fieldsets.resolve(ModuleAssignmentSerializer, fieldsets._tree('module.secret'))
+
+    def test_projection(self):
+        self.assertEqual(fieldsets.projection({'id': None, 'title': None}), ['id', 'title'])
+
+
+class SparseSerializerTests(SimpleTestCase):
+    def setUp(self):
+        self.module = TrainingModule(
+            id=ObjectId(), title='Safety', description='Basics', content='Body', duration_minutes=30,
+            created_at=datetime.datetime(2024, 5, 1),
+        )
+        self.trainee = User(id=ObjectId(), username='sam', first_name='Sam', last_name='Lee', email='sam@example.com')
+        self.assignment = ModuleAssignment(id=ObjectId(), trainee=self.trainee, module=self.module, is_completed=False)
+
+    def test_all_fields_without_selection(self):
+        data = TrainingModuleSerializer(self.module).data
+        self.assertEqual(list(data), list(TrainingModuleSerializer._declared_fields))
+        self.assertEqual(data['content'], 'Body')
+
+    def test_selected_fields_only(self):
+        fields = fieldsets.resolve(TrainingModuleSerializer, fieldsets._tree('title'))
+        self.assertEqual(TrainingModuleSerializer(self.module, fields=fields).data,
+                         {'id': str(self.module.id), 'title': 'Safety'})
+
+    def test_nested_selection(self):
+        fields = fieldsets.resolve(ModuleAssignmentSerializer, fieldsets._tree('trainee.username,module'))
+        data = ModuleAssignmentSerializer(self.assignment, fields=fields).data
+        self.assertEqual(data['trainee'], {'id': str(self.trainee.id), 'username': 'sam'})
+        self.assertNotIn('content', data['module'])
+        self.assertNotIn('assigned_by', data)
+
+    def test_unselected_reference_is_not_read(self):
+        fields = fieldsets.resolve(ModuleAssignmentSerializer, fieldsets._tree('is_completed'))
+        serializer = ModuleAssignmentSerializer(self.assignment, fields=fields)
+        self.assertIsNone(serializer.nested(self.assignment, 'module'))
+        self.assertEqual(serializer.data, {'id': str(self.assignment.id), 'is_completed': False})
@@ -0,0 +1,39 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from training.hashing import HashingBusy, HashingPool
+
+
+class HashingLimitTests(SimpleTestCase):
+    def hold(self, pool, count):
+        # Occupies ``count`` slots until the returned event is set
+        release = threading.Event()
+        started = threading.Barrier(count + 1)
+
+        def wait():
+            started.wait()
+            release.wait()
+
+        threads = [threading.Thread(target=pool._run, args=(wait,)) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        started.wait()
+        self.addCleanup(lambda: (release.set(), [thread.join() for thread in threads]))
+        return release
+
+    def test_limit_is_split_between_processes(self):
+        pool = HashingPool(workers=0, max_in_flight=4, processes=2)
+        self.hold(pool, 2)
+        with self.assertRaises(HashingBusy):
+            pool._run(lambda: None)
+
+    def test_slots_are_released(self):
+        pool = HashingPool(workers=0, max_in_flight=1, processes=1)
+        pool._run(lambda: None)
+        self.assertIsNone(pool._run(lambda: None))
+
+    def test_zero_disables_the_limit(self):
+        pool = HashingPool(workers=0, max_in_flight=0, processes=4)
+        self.hold(pool, 3)
+        self.assertIsNone(pool._run(lambda: None))
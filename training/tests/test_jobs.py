@@ -0,0 +1,51 @@
+import datetime
+from unittest import mock
+
+from bson import ObjectId
+from django.test import SimpleTestCase, override_settings
+
+from training import jobs
+
+ORPHAN = ObjectId('65f000000000000000000001')
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@override_settings(JOB_STALE_SECONDS=300)
+class MonitorTests(SimpleTestCase):
+    def setUp(self):
+        self.collection = mock.MagicMock()
+        self.collection.update_many.return_value.modified_count = 0
+        patches = [
+            mock.patch.object(jobs.Job, '_get_collection', return_value=self.collection),
+            mock.patch.object(jobs, '_get_executor', return_value=InlineExecutor()),
+            mock.patch.object(jobs, 'execute'),
+            mock.patch.object(jobs, 'run_periodic'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_runs_queued_job_left_without_a_runner(self):
+        # Nothing was re-queued, but a job enqueued by a process that died is still waiting
+        self.collection.find_one.return_value = {'_id': ORPHAN}
+        self.collection.find_one_and_update.side_effect = [{'_id': ORPHAN, 'kind': 'bulk_assign'}, None]
+        jobs.check()
+
+        jobs.execute.assert_called_once_with(ORPHAN)
+        jobs.run_periodic.assert_called_once_with()
+        claimed = self.collection.find_one_and_update.call_args_list[0].args[0]
+        self.assertEqual(claimed['status'], 'queued')
+        cutoff = claimed['created_at']['$lt']
+        self.assertLess(cutoff, datetime.datetime.utcnow() - datetime.timedelta(seconds=299))
+        self.assertFalse(jobs._sweeping)
+
+    def test_leaves_fresh_jobs_to_their_threads(self):
+        self.collection.find_one.return_value = None
+        jobs.check()
+
+        self.collection.find_one_and_update.assert_not_called()
+        jobs.execute.assert_not_called()
@@ -0,0 +1,33 @@
+from bson import DBRef, ObjectId
+from django.test import SimpleTestCase
+
+from training.serializers import BROADCAST_RECIPIENT, broadcast_recipient
+
+TRAINEE = ObjectId('65f000000000000000000001')
+INSTRUCTORS = [ObjectId('65f000000000000000000002'), ObjectId('65f000000000000000000003')]
+
+
+def summary(user_id):
+    return {'id': str(user_id), 'username': 'someone', 'role': 'instructor'}
+
+
+class BroadcastRecipientTests(SimpleTestCase):
+    def test_instructor_sees_themselves(self):
+        viewer = summary(INSTRUCTORS[1])
+        self.assertEqual(broadcast_recipient(INSTRUCTORS, TRAINEE, INSTRUCTORS[1], viewer), viewer)
+
+    def test_trainee_reading_back_their_question(self):
+        self.assertEqual(
+            broadcast_recipient(INSTRUCTORS, TRAINEE, TRAINEE, summary(TRAINEE)), BROADCAST_RECIPIENT
+        )
+
+    def test_sender_among_recipients_is_still_the_sender(self):
+        self.assertEqual(
+            broadcast_recipient(INSTRUCTORS, INSTRUCTORS[0], INSTRUCTORS[0], summary(INSTRUCTORS[0])),
+            BROADCAST_RECIPIENT,
+        )
+
+    def test_references_are_compared_by_id(self):
+        viewer = summary(INSTRUCTORS[0])
+        recipients = [DBRef('user', pk) for pk in INSTRUCTORS]
+        self.assertEqual(broadcast_recipient(recipients, TRAINEE, INSTRUCTORS[0], viewer), viewer)
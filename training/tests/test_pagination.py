@@ -0,0 +1,64 @@
+import datetime
+
+from bson import ObjectId
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from training.pagination import KeysetPagination
+
+
+def make_request(**params):
+    return Request(APIRequestFactory().get('/api/items/', params))
+
+
+class KeysetPaginationTests(SimpleTestCase):
+    def test_cursor_round_trip(self):
+        paginator = KeysetPagination(ordering=('-timestamp', '-_id'))
+        position = [datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc), ObjectId()]
+        cursor = paginator.encode_cursor(position)
+        self.assertEqual(paginator.decode_cursor(make_request(cursor=cursor)), position)
+
+    def test_missing_cursor_starts_at_first_page(self):
+        paginator = KeysetPagination()
+        query, sort, limit = paginator.prepare(make_request(page_size=10))
+        self.assertEqual(query, {})
+        self.assertEqual(sort, [('_id', 1)])
+        self.assertEqual(limit, 11)
+
+    def test_tampered_cursor_is_rejected(self):
+        paginator = KeysetPagination()
+        cursor = paginator.encode_cursor([ObjectId()])
+        for tampered in ('not-base64!', cursor[:-4], 'W1sib2lkIiwgIm5vcGUiXV0=', paginator.encode_cursor([1, 2])):
+            with self.subTest(cursor=tampered), self.assertRaises(NotFound):
+                paginator.decode_cursor(make_request(cursor=tampered))
+
+    def test_after_breaks_ties_on_the_last_field(self):
+        paginator = KeysetPagination(ordering=('-timestamp', '-_id'))
+        timestamp, last_id = datetime.datetime(2024, 5, 1), ObjectId()
+        self.assertEqual(paginator._after([timestamp, last_id]), {'$or': [
+            {'timestamp': {'$lt': timestamp}},
+            {'timestamp': timestamp, '_id': {'$lt': last_id}},
+        ]})
+
+    def test_finish_sets_cursor_from_last_row_of_page(self):
+        paginator = KeysetPagination(ordering=('score', '_id'))
+        paginator.prepare(make_request(page_size=2))
+        rows = [{'_id': ObjectId(), 'score': 1} for _ in range(3)]
+        page = paginator.finish(rows)
+        self.assertEqual(page, rows[:2])
+        self.assertEqual(paginator.decode_cursor(make_request(cursor=paginator.next_cursor)), [1, rows[1]['_id']])
+
+    def test_last_page_has_no_cursor(self):
+        paginator = KeysetPagination()
+        paginator.prepare(make_request(page_size=5))
+        paginator.finish([{'_id': ObjectId()}])
+        self.assertIsNone(paginator.next_cursor)
+
+    @override_settings(KEYSET_MAX_PAGE_SIZE=50)
+    def test_page_size_is_clamped(self):
+        paginator = KeysetPagination()
+        self.assertEqual(paginator.get_page_size(make_request(page_size=10000)), 50)
+        self.assertEqual(paginator.get_page_size(make_request(page_size=0)), 1)
+        self.assertEqual(paginator.get_page_size(make_request(page_size='many')), 50)
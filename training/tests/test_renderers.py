@@ -0,0 +1,81 @@
+import datetime
+import io
+
+import msgpack
+import orjson
+from asgiref.sync import async_to_sync
+from bson import ObjectId
+from django.test import RequestFactory, SimpleTestCase
+from rest_framework.exceptions import ParseError
+
+from training.renderers import MessagePackParser, MessagePackRenderer, ORJSONParser, ORJSONRenderer
+
+OID = ObjectId('65f000000000000000000001')
+WHEN = datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc)
+
+
+class RendererTests(SimpleTestCase):
+    def test_json_matches_drf_encoding(self):
+        body = ORJSONRenderer().render({'id': OID, 'at': WHEN, 'buckets': {0: 1, 25: 2}})
+        self.assertEqual(orjson.loads(body), {
+            'id': str(OID), 'at': '2024-05-01T12:30:00Z', 'buckets': {'0': 1, '25': 2},
+        })
+
+    def test_json_indent(self):
+        body = ORJSONRenderer().render({'a': 1}, 'application/json; indent=4')
+        self.assertIn(b'\n', body)
+
+    def test_msgpack_encodes_like_json(self):
+        body = MessagePackRenderer().render({'id': OID, 'at': WHEN, 'tags': ('a', 'b')})
+        self.assertEqual(msgpack.unpackb(body), {'id': str(OID), 'at': '2024-05-01T12:30:00Z', 'tags': ['a', 'b']})
+
+    def test_none_renders_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+        self.assertEqual(MessagePackRenderer().render(None), b'')
+
+    def test_unknown_type_raises(self):
+        with self.assertRaises(TypeError):
+            MessagePackRenderer().render({'value': object()})
+
+
+class ParserTests(SimpleTestCase):
+    def test_round_trip(self):
+        data = {'title': 'Safety', 'order': 3}
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(orjson.dumps(data))), data)
+        self.assertEqual(MessagePackParser().parse(io.BytesIO(msgpack.packb(data))), data)
+
+    def test_malformed_body(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"title":'))
+        with self.assertRaises(ParseError):
+            MessagePackParser().parse(io.BytesIO(b'\xc1'))
+
+
+class AsyncNegotiationTests(SimpleTestCase):
+    def setUp(self):
+        from training import async_views
+
+        async def view(request):
+            return async_views._render(request, {'id': OID})
+
+        self.view = async_views.async_api()(view)
+        self.factory = RequestFactory()
+
+    def get(self, **headers):
+        return async_to_sync(self.view)(self.factory.get('/api/async/modules/', **headers))
+
+    def test_errors_use_the_negotiated_renderer(self):
+        response = self.get(HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertIn('detail', msgpack.unpackb(response.content))
+
+    def test_json_by_default(self):
+        response = self.get()
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', orjson.loads(response.content))
+
+    def test_unsupported_accept_is_not_acceptable(self):
+        response = self.get(HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(response['Content-Type'], 'application/json')
@@ -0,0 +1,20 @@
+from django.test import SimpleTestCase
+
+from training.search import grams
+
+
+class GramsTests(SimpleTestCase):
+    def test_words_are_padded_and_lowercased(self):
+        self.assertEqual(grams('Go'), ['  g', ' go', 'go '])
+
+    def test_partial_leaves_last_word_open(self):
+        self.assertEqual(grams('go', partial=True), ['  g', ' go'])
+        self.assertIn('ty ', grams('safety fi', partial=True))
+        self.assertNotIn('fi ', grams('safety fi', partial=True))
+
+    def test_prefix_shares_trigrams_with_full_word(self):
+        self.assertTrue(set(grams('saf', partial=True)) <= set(grams('Safety')))
+
+    def test_empty_text(self):
+        self.assertEqual(grams(None), [])
+        self.assertEqual(grams(' -- '), [])
@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase
+
+from training import snapshots
+
+
+class TotalsTests(SimpleTestCase):
+    def test_trainee_row_counts_in_its_bucket(self):
+        self.assertEqual(
+            snapshots._totals(snapshots.TRAINEE, {'completion_percentage': 60}),
+            {'total_trainees': 1, 'progress_distribution.50': 1},
+        )
+
+    def test_module_row(self):
+        self.assertEqual(
+            snapshots._totals(snapshots.MODULE, {'assigned_count': 4, 'completed_count': 1}),
+            {'total_modules': 1, 'assigned_modules_count': 1, 'assigned_total': 4, 'completed_total': 1},
+        )
+        self.assertEqual(snapshots._totals(snapshots.MODULE, {'assigned_count': 0, 'completed_count': 0})
+                         ['assigned_modules_count'], 0)
+
+    def test_missing_row_adds_nothing(self):
+        self.assertEqual(snapshots._totals(snapshots.TRAINEE, None), {})
+
+    def test_summary(self):
+        snapshot = {
+            'total_trainees': 3, 'total_modules': 2, 'assigned_modules_count': 1,
+            'assigned_total': 10, 'completed_total': 4, 'in_progress': 2,
+            'progress_distribution': {'0': 1, '100': 2},
+        }
+        self.assertEqual(snapshots.summary(snapshot), {
+            'total_trainees': 3,
+            'total_modules': 2,
+            'assigned_modules_count': 1,
+            'unassigned_modules_count': 1,
+            'progress_distribution': {0: 1, 25: 0, 50: 0, 75: 0, 100: 2},
+            'assignment_status_summary': {'completed': 4, 'in_progress': 2, 'not_started': 4, 'total': 10},
+        })
@@ -0,0 +1,63 @@
+import asyncio
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from training import tracing
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(tracing.percentile(values, 50), 3)
+        self.assertEqual(tracing.percentile(values, 95), 5)
+        self.assertEqual(tracing.percentile(values, 0), 1)
+
+    def test_empty(self):
+        self.assertEqual(tracing.percentile([], 95), 0.0)
+
+
+class StreamingTraceTests(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/api/exports/assignments/')
+
+    def test_sync_body_runs_inside_the_request_trace(self):
+        seen = []
+
+        def body():
+            for chunk in ('a', 'b'):
+                seen.append(tracing.current_trace())
+                yield chunk
+
+        middleware = tracing.MongoTracingMiddleware(lambda request: StreamingHttpResponse(body()))
+        response = middleware(self.request)
+        self.assertIn('Server-Timing', response)
+        self.assertEqual(b''.join(response.streaming_content), b'ab')
+        self.assertEqual(len(seen), 2)
+        self.assertIsNotNone(seen[0])
+        self.assertIs(seen[0], seen[1])
+        self.assertIsNone(tracing.current_trace())
+
+    def test_async_body_runs_inside_the_request_trace(self):
+        seen = []
+
+        async def body():
+            for chunk in ('a', 'b'):
+                seen.append(tracing.current_trace())
+                yield chunk
+
+        async def get_response(request):
+            return StreamingHttpResponse(body())
+
+        async def consume():
+            response = await tracing.MongoTracingMiddleware(get_response)(self.request)
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(asyncio.run(consume()), b'ab')
+        self.assertIsNotNone(seen[0])
+        self.assertIs(seen[0], seen[1])
+
+    def test_plain_response_is_untouched(self):
+        response = tracing.MongoTracingMiddleware(lambda request: HttpResponse('ok'))(self.request)
+        self.assertEqual(response.content, b'ok')
+        self.assertIn('Server-Timing', response)
@@ -0,0 +1,217 @@
+import contextvars
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from pymongo import monitoring
+
+logger = logging.getLogger('training.tracing')
+
+_current = contextvars.ContextVar('mongo_trace', default=None)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Nearest-rank percentile
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class RequestTrace:
+    """Mongo commands issued while serving one request."""
+
+    def __init__(self):
+        self.commands = 0
+        self.documents = 0
+        self.duration_ms = 0.0
+        self.pool_wait_ms = 0.0
+        # (collection, command) -> [count, duration_ms, documents]
+        self.breakdown = defaultdict(lambda: [0, 0.0, 0])
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        command = event.command
+        name = event.command_name
+        target = command.get('collection') if name == 'getMore' else command.get(name)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                target if isinstance(target, str) else '', name
+            )
+
+    def finished(self, event, documents=0):
+        duration_ms = event.duration_micros / 1000
+        with self._lock:
+            key = self._pending.pop((event.connection_id, event.request_id), ('', event.command_name))
+            self.commands += 1
+            self.documents += documents
+            self.duration_ms += duration_ms
+            entry = self.breakdown[key]
+            entry[0] += 1
+            entry[1] += duration_ms
+            entry[2] += documents
+
+    def pool_wait(self, wait_ms):
+        with self._lock:
+            self.pool_wait_ms += wait_ms
+
+    def summary(self):
+        rows = sorted(self.breakdown.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {'collection': collection, 'command': command, 'count': count,
+             'ms': round(duration_ms, 2), 'documents': documents}
+            for (collection, command), (count, duration_ms, documents) in rows
+        ]
+
+
+def _returned(reply):
+    # Documents in a cursor batch; other commands return none
+    cursor = reply.get('cursor') if isinstance(reply, dict) else None
+    if not isinstance(cursor, dict):
+        return 0
+    return len(cursor.get('firstBatch') or cursor.get('nextBatch') or ())
+
+
+class CommandTracer(monitoring.CommandListener):
+    """Attributes Mongo commands to the request active in the calling context.
+
+    Registered globally in settings before the first client is created, so
+    both the mongoengine and Motor clients report here. Commands issued
+    outside a traced request are ignored.
+    """
+
+    def started(self, event):
+        trace = _current.get()
+        if trace is not None:
+            trace.started(event)
+
+    def succeeded(self, event):
+        trace = _current.get()
+        if trace is not None:
+            trace.finished(event, _returned(event.reply))
+
+    def failed(self, event):
+        trace = _current.get()
+        if trace is not None:
+            trace.finished(event)
+
+
+command_tracer = CommandTracer()
+
+
+def current_trace():
+    return _current.get()
+
+
+def _server_timing(trace, total_ms):
+    return (
+        f'total;dur={total_ms:.1f}, '
+        f'db;dur={trace.duration_ms:.1f};desc="{trace.commands} commands, {trace.documents} documents", '
+        f'pool;dur={trace.pool_wait_ms:.1f};desc="connection checkout wait"'
+    )
+
+
+def _log_if_slow(request, status, trace, started_at):
+    total_ms = (time.perf_counter() - started_at) * 1000
+    if total_ms >= settings.SLOW_REQUEST_MS:
+        logger.warning(json.dumps({
+            'event': 'slow_request',
+            'method': request.method,
+            'path': request.path,
+            'status': status,
+            'total_ms': round(total_ms, 2),
+            'db_ms': round(trace.duration_ms, 2),
+            'pool_wait_ms': round(trace.pool_wait_ms, 2),
+            'commands': trace.commands,
+            'documents': trace.documents,
+            'breakdown': trace.summary(),
+        }))
+
+
+def _traced_stream(content, request, status, trace, started_at):
+    # A streaming body is produced after the middleware returns; the trace is
+    # re-entered for each chunk so the export's queries are counted too
+    iterator = iter(content)
+    while True:
+        token = _current.set(trace)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            break
+        finally:
+            _current.reset(token)
+        yield chunk
+    _log_if_slow(request, status, trace, started_at)
+
+
+async def _atraced_stream(content, request, status, trace, started_at):
+    iterator = aiter(content)
+    while True:
+        token = _current.set(trace)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            break
+        finally:
+            _current.reset(token)
+        yield chunk
+    _log_if_slow(request, status, trace, started_at)
+
+
+def _finish(request, response, trace, started_at):
+    total_ms = (time.perf_counter() - started_at) * 1000
+    response['Server-Timing'] = _server_timing(trace, total_ms)
+    if response.streaming:
+        stream = _atraced_stream if response.is_async else _traced_stream
+        response.streaming_content = stream(
+            response.streaming_content, request, response.status_code, trace, started_at
+        )
+    else:
+        _log_if_slow(request, response.status_code, trace, started_at)
+    return response
+
+
+class MongoTracingMiddleware:
+    """Adds a ``Server-Timing`` header with per-request Mongo totals.
+
+    Requests slower than ``SLOW_REQUEST_MS`` are logged to ``training.tracing``
+    as one JSON object including the per-collection command breakdown. For
+    streaming responses the header only covers the work done before the body
+    starts; the log entry is written once the body is sent and covers it all.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trace = RequestTrace()
+        token = _current.set(trace)
+        started_at = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return _finish(request, response, trace, started_at)
+
+    async def __acall__(self, request):
+        trace = RequestTrace()
+        token = _current.set(trace)
+        started_at = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return _finish(request, response, trace, started_at)
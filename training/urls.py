@@ -1,12 +1,14 @@
 from django.urls import path
+from . import async_views, snapshots
 from .views import (
     RegisterView, LoginView, LogoutView, UserProfileView, ChangePasswordView,
-    TrainingModuleListCreateView, TrainingModuleDetailView,
+    TrainingModuleListCreateView, TrainingModuleDetailView, ModuleSearchView, ModuleSuggestView,
     ModuleAssignmentListCreateView, ModuleAssignmentDetailView,
-    TraineeDashboardView, InstructorDashboardView,
+    TraineeDashboardView, InstructorDashboardView, InstructorDashboardRowsView,
     TraineeModuleListView, MarkModuleCompletedView,
     TraineeListView, TraineeProgressView, BulkAssignModuleView, TraineeDeleteView, MessageInstructorView, InstructorMessagesView, InstructorReplyView, TraineeMessagesView,
-    SuperAdminDashboardView, UserListView, UserCreateView, UserUpdateView, UserDeleteView
+    ExportView, SuperAdminDashboardView, UserListView, UserCreateView, UserUpdateView, UserDeleteView,
+    MongoPoolMetricsView, JobCreateView, JobDetailView
 )
 
 urlpatterns = [
@@ -21,6 +23,9 @@ urlpatterns = [
     
     # Training Modules
     path('modules/', TrainingModuleListCreateView.as_view(), name='module-list-create'),
+    path('modules/assign/', BulkAssignModuleView.as_view(), name='bulk-assign-modules'),
+    path('modules/search/', ModuleSearchView.as_view(), name='module-search'),
+    path('modules/search/suggest/', ModuleSuggestView.as_view(), name='module-suggest'),
     path('modules/<str:pk>/', TrainingModuleDetailView.as_view(), name='module-detail'),
     
     # Module Assignments
@@ -30,6 +35,10 @@ urlpatterns = [
     # Dashboards
     path('dashboard/trainee/', TraineeDashboardView.as_view(), name='trainee-dashboard'),
     path('dashboard/instructor/', InstructorDashboardView.as_view(), name='instructor-dashboard'),
+    path('dashboard/instructor/trainees/', InstructorDashboardRowsView.as_view(kind=snapshots.TRAINEE),
+         name='instructor-dashboard-trainees'),
+    path('dashboard/instructor/modules/', InstructorDashboardRowsView.as_view(kind=snapshots.MODULE),
+         name='instructor-dashboard-modules'),
     path('dashboard/superadmin/', SuperAdminDashboardView.as_view(), name='superadmin-dashboard'),
     
     # Trainee-specific
@@ -48,8 +57,20 @@ urlpatterns = [
     path('messages/<str:message_id>/reply/', InstructorReplyView.as_view(), name='instructor-reply'),
     path('messages/my/', TraineeMessagesView.as_view(), name='trainee-messages'),
 
+    path('exports/<slug:dataset>.<slug:fmt>', ExportView.as_view(), name='export'),
+
+    path('jobs/', JobCreateView.as_view(), name='job-create'),
+    path('jobs/<str:job_id>/', JobDetailView.as_view(), name='job-detail'),
+
     path('superadmin/users/', UserListView.as_view(), name='superadmin-user-list'),
     path('superadmin/users/create/', UserCreateView.as_view(), name='superadmin-user-create'),
     path('superadmin/users/<str:user_id>/edit/', UserUpdateView.as_view(), name='superadmin-user-edit'),
     path('superadmin/users/<str:user_id>/delete/', UserDeleteView.as_view(), name='superadmin-user-delete'),
+    path('superadmin/metrics/mongo-pool/', MongoPoolMetricsView.as_view(), name='mongo-pool-metrics'),
+
+    # Async (ASGI) versions of the read-heavy endpoints
+    path('async/modules/', async_views.module_list, name='async-module-list'),
+    path('async/dashboard/trainee/', async_views.trainee_dashboard, name='async-trainee-dashboard'),
+    path('async/dashboard/instructor/', async_views.instructor_dashboard_view, name='async-instructor-dashboard'),
+    path('async/messages/my/', async_views.trainee_messages, name='async-trainee-messages'),
 ] 
\ No newline at end of file
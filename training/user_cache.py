@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.conf import settings
+
+from .models import User
+from .mongo_async import collection
+
+
+class UserCache:
+    """In-process LRU cache of users by id, with a time-to-live per entry.
+
+    Raw documents are cached and a fresh ``User`` is built on every hit, so a
+    view mutating its ``request.user`` never leaks into other requests.
+    Entries are dropped locally through ``invalidate``; other worker processes
+    pick up changes once the TTL expires.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, user_id):
+        try:
+            return ObjectId(str(user_id))
+        except (InvalidId, TypeError):
+            return None
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+        return None
+
+    def _store(self, key, son):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, son)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id):
+        key = self._key(user_id)
+        if key is None:
+            return None
+        son = self._cached(key)
+        if son is None:
+            son = User.objects(id=key).as_pymongo().first()
+            if son is None:
+                return None
+            self._store(key, son)
+        return User._from_son(son)
+
+    async def aget(self, user_id):
+        # Same as get() but loads misses through the async driver
+        key = self._key(user_id)
+        if key is None:
+            return None
+        son = self._cached(key)
+        if son is None:
+            son = await collection(User).find_one({'_id': key})
+            if son is None:
+                return None
+            self._store(key, son)
+        return User._from_son(son)
+
+    def invalidate(self, user_id):
+        key = self._key(user_id)
+        if key is None:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    maxsize=getattr(settings, 'USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'USER_CACHE_TTL', 30),
+)
@@ -4,29 +4,49 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 import jwt
 from django.conf import settings
+from django.http import StreamingHttpResponse
+from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime, timedelta
-from django.db.models import Count, Q
-from .models import User, TrainingModule, ModuleAssignment, Message
+from mongoengine.errors import NotUniqueError
+from mongoengine.queryset.visitor import Q
+from .models import User, TrainingModule, ModuleAssignment, Message, Job
+from .aggregations import PROGRESS_BUCKETS
+from . import counters
+from .prefetch import identity_map
+from .pagination import KeysetPagination
+from .user_cache import user_cache
+from .assignments import bulk_assign
+from .onboarding import onboarding_template
+from .mongo import pool_metrics
+from . import exports
+from . import versioning
+from . import fieldsets
+from . import routing
+from . import cascade
+from . import snapshots
+from . import search
+from . import directory
+from . import jobs
+from . import tasks
+from .versioning import conditional_get
 from .serializers import (
     UserSerializer, UserCreateSerializer, UserUpdateSerializer,
     ChangePasswordSerializer, LoginSerializer, TrainingModuleSerializer,
-    TrainingModuleCreateSerializer, ModuleAssignmentSerializer,
-    ModuleAssignmentCreateSerializer, TraineeDashboardSerializer,
-    InstructorDashboardSerializer, MessageSerializer
+    ModuleAssignmentSerializer, TraineeDashboardSerializer, MessageSerializer, broadcast_recipient
 )
 
 class IsInstructor(permissions.BasePermission):
     def has_permission(self, request, view):
-        print(f"IsInstructor permission check - User: {request.user.username}, Role: {request.user.role}")
-        return request.user.role == 'instructor'
+        return bool(request.user and request.user.role == 'instructor')
 
 class IsTrainee(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.role == 'trainee'
+        return bool(request.user and request.user.role == 'trainee')
 
 class IsSuperAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.role == 'superadmin'
+        return bool(request.user and request.user.role == 'superadmin')
 
 # Helper function to generate JWT tokens
 
@@ -42,29 +62,18 @@ def generate_jwt(user):
     return token
 
 class RegisterView(APIView):
+    authentication_classes = []
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
         serializer = UserCreateSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
+            # Onboarding counters go in with the user; the assignments follow in one insert
+            modules = onboarding_template.modules()
+            user = serializer.save(**onboarding_template.progress(modules))
+            onboarding_template.assign(user, modules)
             access = generate_jwt(user)
 
-            # Assign 6 initial modules (3 completed, 3 incomplete)
-            from training.models import TrainingModule, ModuleAssignment
-            from datetime import datetime
-            modules = TrainingModule.objects.order_by('id')[:6]
-            for i, module in enumerate(modules):
-                assignment = ModuleAssignment(
-                    trainee=user,
-                    module=module,
-                    assigned_by=None,
-                    is_completed=i < 3,
-                    assigned_at=datetime.utcnow(),
-                    completed_at=datetime.utcnow() if i < 3 else None
-                )
-                assignment.save()
-
             return Response({
                 'user': UserSerializer(user).data,
                 'access': access,
@@ -72,6 +81,7 @@ class RegisterView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LoginView(APIView):
+    authentication_classes = []
     permission_classes = [permissions.AllowAny]
     
     def post(self, request):
@@ -97,50 +107,22 @@ class LogoutView(APIView):
 
 # User Management Views
 class UserProfileView(APIView):
-    permission_classes = [permissions.AllowAny]
+    permission_classes = [permissions.IsAuthenticated]
     def get(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user:
-            return Response({'error': 'User not found'}, status=404)
-
-        serializer = UserSerializer(user)
+        serializer = UserSerializer(request.user, fields=fieldsets.select(request, UserSerializer, summary=False))
         return Response(serializer.data)
     
     def put(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user:
-            return Response({'error': 'User not found'}, status=404)
-
+        user = request.user
         serializer = UserUpdateSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             # Update fields manually for MongoEngine
             for attr, value in serializer.validated_data.items():
                 setattr(user, attr, value)
             user.save()
+            user_cache.invalidate(user.pk)
+            versioning.user_changed(user.pk)
+            snapshots.mark([user.pk])
             return Response(UserSerializer(user).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -152,97 +134,49 @@ class ChangePasswordView(APIView):
             if user.check_password(serializer.validated_data['old_password']):
                 user.set_password(serializer.validated_data['new_password'])
                 user.save()
+                user_cache.invalidate(user.pk)
+                versioning.user_changed(user.pk)
                 return Response({"message": "Password changed successfully"})
             return Response({"error": "Invalid old password"}, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 # Training Module Views
 class TrainingModuleListCreateView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
 
+    @conditional_get([versioning.MODULES])
     def get(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
-
-        modules = TrainingModule.objects(is_active=True)
-        serializer = TrainingModuleSerializer(modules, many=True)
-        return Response(serializer.data)
+        fields = fieldsets.select(request, TrainingModuleSerializer)
+        paginator = KeysetPagination()
+        modules = paginator.paginate_queryset(
+            TrainingModule.objects(is_active=True).only(*fieldsets.projection(fields)), request
+        )
+        serializer = TrainingModuleSerializer(modules, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
-
         serializer = TrainingModuleSerializer(data=request.data)
         if serializer.is_valid():
             module = TrainingModule(**serializer.validated_data)
-            module.created_by = user
+            module.created_by = request.user
             module.save()
+            versioning.bump(versioning.MODULES)
+            snapshots.mark(module_ids=[module.pk])
             return Response(TrainingModuleSerializer(module).data, status=201)
         return Response(serializer.errors, status=400)
 
 class TrainingModuleDetailView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
 
     def get(self, request, pk):
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
-        module = TrainingModule.objects(id=pk).first()
+        fields = fieldsets.select(request, TrainingModuleSerializer, summary=False)
+        module = TrainingModule.objects(id=pk).only(*fieldsets.projection(fields)).first()
         if not module:
             return Response({'error': 'Module not found'}, status=404)
-        serializer = TrainingModuleSerializer(module)
+        serializer = TrainingModuleSerializer(module, fields=fields)
         return Response(serializer.data)
 
     def put(self, request, pk):
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
         module = TrainingModule.objects(id=pk).first()
         if not module:
             return Response({'error': 'Module not found'}, status=404)
@@ -254,49 +188,51 @@ class TrainingModuleDetailView(APIView):
         module.is_active = data.get('is_active', module.is_active)
         module.updated_at = datetime.utcnow()
         module.save()
+        versioning.bump(versioning.MODULES)
+        snapshots.mark(module_ids=[module.pk])
         serializer = TrainingModuleSerializer(module)
         return Response(serializer.data)
 
     def delete(self, request, pk):
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
         module = TrainingModule.objects(id=pk).first()
         if not module:
             return Response({'error': 'Module not found'}, status=404)
         module.delete()
-        return Response({'message': 'Module deleted successfully.'}, status=204)
+        versioning.bump(versioning.MODULES)
+        snapshots.mark(module_ids=[module.pk])
+        job = cascade.module_deleted(module, request.user)
+        return Response({'message': 'Module deleted. Its assignments are being removed.', 'job': jobs.serialize(job)},
+                        status=status.HTTP_202_ACCEPTED)
 
 # Module Assignment Views
-class ModuleAssignmentListCreateView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+class ModuleSearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
 
     def get(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q is required'}, status=400)
+        fields = fieldsets.select(request, TrainingModuleSerializer)
+        # Best match first; the cursor carries the relevance score of the last result
+        paginator = KeysetPagination(ordering=('-score', '_id'))
+        after, _, limit = paginator.prepare(request)
+        rows = paginator.finish(search.search(query, after, limit, fieldsets.projection(fields)))
+        data = []
+        for row in rows:
+            score = row.pop('score')
+            data.append(dict(TrainingModuleSerializer(TrainingModule._from_son(row), fields=fields).data, score=score))
+        return paginator.get_paginated_response(data)
 
+class ModuleSuggestView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def get(self, request):
+        return Response({'results': search.suggest(request.query_params.get('q', ''))})
+
+class ModuleAssignmentListCreateView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def get(self, request):
         module_id = request.query_params.get('module_id')
         trainee_id = request.query_params.get('trainee_id')
         queryset = ModuleAssignment.objects
@@ -304,26 +240,15 @@ class ModuleAssignmentListCreateView(APIView):
             queryset = queryset(module=module_id)
         if trainee_id:
             queryset = queryset(trainee=trainee_id)
-        assignments = list(queryset)
-        serializer = ModuleAssignmentSerializer(assignments, many=True)
-        return Response(serializer.data)
+        fields = fieldsets.select(request, ModuleAssignmentSerializer)
+        paginator = KeysetPagination()
+        assignments = paginator.paginate_queryset(queryset.only(*fieldsets.projection(fields)), request)
+        serializer = ModuleAssignmentSerializer(
+            assignments, many=True, fields=fields, context={'identity_map': identity_map(request)}
+        )
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
-
         data = request.data
         trainee_id = data.get('trainee_id')
         module_id = data.get('module_id')
@@ -333,68 +258,66 @@ class ModuleAssignmentListCreateView(APIView):
         module = TrainingModule.objects(id=module_id).first()
         if not trainee or not module:
             return Response({'error': 'Trainee or Module not found'}, status=404)
+        existing = ModuleAssignment.objects(trainee=trainee, module=module).first()
+        if existing:
+            return Response({'error': 'Module is already assigned to this trainee.',
+                             'assignment': ModuleAssignmentSerializer(existing).data}, status=409)
         assignment = ModuleAssignment(
             trainee=trainee,
             module=module,
-            assigned_by=user,
+            assigned_by=request.user,
             is_completed=False,
             assigned_at=datetime.utcnow()
         )
-        assignment.save()
+        try:
+            assignment.save()
+        except NotUniqueError:
+            # Lost a race with a concurrent request for the same pair
+            return Response({'error': 'Module is already assigned to this trainee.'}, status=409)
+        counters.assignment_added(trainee, module)
         serializer = ModuleAssignmentSerializer(assignment)
         return Response(serializer.data, status=201)
 
 class ModuleAssignmentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = ModuleAssignment.objects.all()
     serializer_class = ModuleAssignmentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        # Built per request so importing the views never opens a Mongo connection
+        return ModuleAssignment.objects.all()
+
 # Dashboard Views
 class TraineeDashboardView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based, so no DRF auth
+    permission_classes = [permissions.IsAuthenticated]
     
+    @conditional_get(lambda request: [
+        versioning.MODULES,
+        versioning.user_scope(request.user.pk),
+        versioning.assignments_scope(request.user.pk),
+    ])
     def get(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user:
-            return Response({'error': 'User not found'}, status=404)
+        user = request.user
 
         assignments = ModuleAssignment.objects(trainee=user)
-        total_assigned = assignments.count()
-        completed = assignments.filter(is_completed=True).count()
-        pending = total_assigned - completed
-        completion_percentage = (completed / total_assigned * 100) if total_assigned > 0 else 0
-
-        progress = {
-            'total_assigned': total_assigned,
-            'completed': completed,
-            'pending': pending,
-            'completion_percentage': round(completion_percentage, 2)
-        }
+        progress = counters.load_trainee_progress(user)
+        # Trainees read modules here, so content is included unless ?fields= narrows it
+        module_fields = fieldsets.select(request, TrainingModuleSerializer, summary=False)
 
         assigned_modules = []
+        assignments = identity_map(request).prefetch(
+            assignments, 'module', only={'module': fieldsets.projection(module_fields)}
+        )
         for assignment in assignments:
             assigned_modules.append({
                 'id': str(assignment.id),
-                'module': TrainingModuleSerializer(assignment.module).data,
+                'module': TrainingModuleSerializer(assignment.module, fields=module_fields).data if assignment.module else None,
                 'is_completed': assignment.is_completed,
                 'assigned_at': assignment.assigned_at,
                 'completed_at': assignment.completed_at
             })
 
         dashboard_data = {
-            'user': UserSerializer(user).data,
+            'user': user,
             'progress': progress,
             'assigned_modules': assigned_modules
         }
@@ -403,126 +326,46 @@ class TraineeDashboardView(APIView):
         return Response(serializer.data)
 
 class InstructorDashboardView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
 
     def get(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
-
-        trainees = User.objects(role='trainee', is_active=True)
-        modules = TrainingModule.objects.all()
-        assignments = ModuleAssignment.objects.all()
-
-        # Module stats
-        module_stats = []
-        assigned_modules_count = 0
-        unassigned_modules_count = 0
-        for module in modules:
-            module_assignments = assignments.filter(module=module)
-            assigned_count = module_assignments.count()
-            completed_count = module_assignments.filter(is_completed=True).count()
-            completion_rate = (completed_count / assigned_count * 100) if assigned_count > 0 else 0
-            if assigned_count > 0:
-                assigned_modules_count += 1
-            else:
-                unassigned_modules_count += 1
-            module_stats.append({
-                'id': str(module.id),
-                'title': module.title,
-                'assigned_count': assigned_count,
-                'completed_count': completed_count,
-                'completion_rate': round(completion_rate, 2),
-            })
-
-        # Trainee stats
-        trainee_stats = []
-        progress_buckets = {0: 0, 25: 0, 50: 0, 75: 0, 100: 0}
-        for trainee in trainees:
-            trainee_assignments = assignments.filter(trainee=trainee)
-            total = trainee_assignments.count()
-            completed = trainee_assignments.filter(is_completed=True).count()
-            completion_percentage = int(round((completed / total * 100), 0)) if total > 0 else 0
-            # Bucket to nearest 0, 25, 50, 75, 100
-            if completion_percentage == 100:
-                bucket = 100
-            elif completion_percentage >= 75:
-                bucket = 75
-            elif completion_percentage >= 50:
-                bucket = 50
-            elif completion_percentage >= 25:
-                bucket = 25
-            else:
-                bucket = 0
-            progress_buckets[bucket] += 1
-            trainee_stats.append({
-                'id': str(trainee.id),
-                'username': trainee.username,
-                'email': trainee.email,
-                'created_at': trainee.created_at.isoformat() if trainee.created_at else None,
-                'completion_percentage': completion_percentage,
-            })
+        # Served from a precomputed snapshot; see training.snapshots
+        return Response(snapshots.dashboard(KeysetPagination().get_page_size(request)))
 
-        # Assignment status summary
-        total_assignments = assignments.count()
-        completed_assignments = assignments.filter(is_completed=True).count()
-        in_progress_assignments = assignments.filter(is_completed=False, completed_at__ne=None).count()
-        not_started_assignments = assignments.filter(is_completed=False, completed_at=None).count()
-        assignment_status_summary = {
-            'completed': completed_assignments,
-            'in_progress': in_progress_assignments,
-            'not_started': not_started_assignments,
-            'total': total_assignments
-        }
+class InstructorDashboardRowsView(APIView):
+    # The trainee or module rows of the instructor dashboard, past its first page
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+    kind = None
 
-        dashboard_data = {
-            'total_trainees': trainees.count(),
-            'total_modules': modules.count(),
-            'assigned_modules_count': assigned_modules_count,
-            'unassigned_modules_count': unassigned_modules_count,
-            'trainees': trainee_stats,
-            'modules': module_stats,
-            'progress_distribution': progress_buckets,
-            'assignment_status_summary': assignment_status_summary,
-        }
-        return Response(dashboard_data)
+    def get(self, request):
+        snapshots.current()
+        paginator = KeysetPagination()
+        query, sort, limit = paginator.prepare(request)
+        page = paginator.finish(snapshots.rows(self.kind, query, sort, limit))
+        return paginator.get_paginated_response([doc['row'] for doc in page])
 
 # Trainee-specific Views
 class TraineeModuleListView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+    permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_get(lambda request: [
+        versioning.MODULES,
+        versioning.USERS,
+        versioning.assignments_scope(request.user.pk),
+    ])
     def get(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user:
-            return Response({'error': 'User not found'}, status=404)
-
-        assignments = ModuleAssignment.objects(trainee=user)
-        serializer = ModuleAssignmentSerializer(assignments, many=True)
-        return Response(serializer.data)
+        user = request.user
+        fields = fieldsets.select(request, ModuleAssignmentSerializer)
+        paginator = KeysetPagination()
+        assignments = paginator.paginate_queryset(
+            ModuleAssignment.objects(trainee=user).only(*fieldsets.projection(fields)), request
+        )
+        request_identity_map = identity_map(request)
+        request_identity_map.add(user)
+        serializer = ModuleAssignmentSerializer(
+            assignments, many=True, fields=fields, context={'identity_map': request_identity_map}
+        )
+        return paginator.get_paginated_response(serializer.data)
 
 class MarkModuleCompletedView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsTrainee]
@@ -544,28 +387,38 @@ class MarkModuleCompletedView(APIView):
 
 # Instructor-specific Views
 class TraineeListView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
 
     def get(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
-
-        trainees = User.objects(role='trainee', is_active=True)
-        serializer = UserSerializer(trainees, many=True)
-        return Response(serializer.data)
+        fields = fieldsets.select(request, UserSerializer)
+        params = request.query_params
+        completion = params.get('completion')
+        if completion is not None:
+            if completion not in [str(bucket) for bucket in PROGRESS_BUCKETS]:
+                return Response({'error': f'completion must be one of {PROGRESS_BUCKETS}'}, status=400)
+            completion = int(completion)
+        module_id = params.get('module')
+        if module_id is not None:
+            try:
+                module_id = ObjectId(module_id)
+            except InvalidId:
+                return Response({'error': 'Invalid module id.'}, status=400)
+        module_status = params.get('module_status')
+        if module_status not in (None, 'completed', 'pending'):
+            return Response({'error': 'module_status must be completed or pending'}, status=400)
+
+        paginator = KeysetPagination()
+        after, _, limit = paginator.prepare(request)
+        rows = directory.trainees(
+            after, limit, ['_id' if field == 'id' else field for field in fieldsets.projection(fields)],
+            prefix=params.get('q', '').strip(),
+            completion=completion,
+            module_id=module_id,
+            completed=None if module_status is None else module_status == 'completed',
+        )
+        trainees = [User._from_son(row) for row in paginator.finish(rows)]
+        serializer = UserSerializer(trainees, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
 class TraineeProgressView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsInstructor]
@@ -575,18 +428,14 @@ class TraineeProgressView(APIView):
             trainee = User.objects.get(id=trainee_id, role='trainee')
             assignments = ModuleAssignment.objects.filter(trainee=trainee)
             
-            total_assigned = assignments.count()
-            completed = assignments.filter(is_completed=True).count()
-            pending = total_assigned - completed
-            completion_percentage = (completed / total_assigned * 100) if total_assigned > 0 else 0
-            
+            request_identity_map = identity_map(request)
+            request_identity_map.add(trainee)
             progress = {
                 'trainee': UserSerializer(trainee).data,
-                'total_assigned': total_assigned,
-                'completed': completed,
-                'pending': pending,
-                'completion_percentage': round(completion_percentage, 2),
-                'assignments': ModuleAssignmentSerializer(assignments, many=True).data
+                **counters.trainee_progress(trainee),
+                'assignments': ModuleAssignmentSerializer(
+                    assignments, many=True, context={'identity_map': request_identity_map}
+                ).data
             }
             
             return Response(progress)
@@ -596,151 +445,108 @@ class TraineeProgressView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+def bulk_assign_ids(data, module_id=None):
+    """Return (trainee_ids, module_ids, error) from a bulk assignment request body."""
+    trainee_ids = data.get('trainee_ids', [])
+    module_ids = data.get('module_ids', [])
+    if not isinstance(trainee_ids, list) or not isinstance(module_ids, list):
+        return None, None, 'trainee_ids and module_ids must be lists'
+    if not trainee_ids:
+        return None, None, 'No trainee IDs provided'
+    if module_id:
+        module_ids = [module_id] + module_ids
+    if not module_ids:
+        return None, None, 'No module IDs provided'
+    return trainee_ids, module_ids, None
+
 class BulkAssignModuleView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
-
-    def post(self, request, module_id):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
-
-        trainee_ids = request.data.get('trainee_ids', [])
-        if not isinstance(trainee_ids, list):
-            return Response({'error': 'trainee_ids must be a list'}, status=400)
-        if not trainee_ids:
-            return Response({'error': 'No trainee IDs provided'}, status=400)
-        module = TrainingModule.objects(id=module_id).first()
-        if not module:
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def post(self, request, module_id=None):
+        trainee_ids, module_ids, error = bulk_assign_ids(request.data, module_id)
+        if error:
+            return Response({'error': error}, status=400)
+
+        # Large requests run as a background job instead of holding the worker
+        if len(trainee_ids) * len(module_ids) > settings.JOB_INLINE_ASSIGNMENTS:
+            job = jobs.enqueue(tasks.BULK_ASSIGN, {
+                'trainee_ids': [str(pk) for pk in trainee_ids],
+                'module_ids': [str(pk) for pk in module_ids],
+                'assigned_by': str(request.user.pk),
+            }, request.user)
+            return Response({'message': 'Assignment started.', 'job': jobs.serialize(job)},
+                            status=status.HTTP_202_ACCEPTED)
+
+        result = bulk_assign(trainee_ids, module_ids, request.user, with_ids=True)
+        if not result.pop('modules_found'):
             return Response({'error': 'Module not found'}, status=404)
-        assigned = []
-        errors = []
-        for trainee_id in trainee_ids:
-            trainee = User.objects(id=trainee_id, role='trainee').first()
-            if not trainee:
-                errors.append(f'Trainee with ID {trainee_id} not found')
-                continue
-            assignment = ModuleAssignment.objects(trainee=trainee, module=module).first()
-            if not assignment:
-                assignment = ModuleAssignment(
-                    trainee=trainee,
-                    module=module,
-                    assigned_by=user,
-                    is_completed=False,
-                    assigned_at=datetime.utcnow()
-                )
-                assignment.save()
-            assigned.append(str(assignment.id))
+        # Both totals count (trainee, module) assignments
         response_data = {
-            'assigned': assigned,
-            'total_requested': len(trainee_ids),
-            'successfully_assigned': len(assigned)
+            'assigned': result.pop('assigned'),
+            'total_requested': len(trainee_ids) * len(module_ids),
+            'successfully_assigned': result['inserted'] + result['skipped'],
+            **result,
         }
-        if errors:
-            response_data['errors'] = errors
+        if not response_data['errors']:
+            del response_data['errors']
         return Response(response_data, status=201)
 
 class TraineeDeleteView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
 
     def delete(self, request, trainee_id):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
         trainee = User.objects(id=trainee_id, role='trainee').first()
         if not trainee:
             return Response({'error': 'Trainee not found.'}, status=404)
         trainee.delete()
-        return Response({'message': 'Trainee deleted successfully.'}, status=204)
+        user_cache.invalidate(trainee.pk)
+        versioning.user_changed(trainee.pk)
+        snapshots.mark([trainee.pk])
+        job = cascade.user_deleted(trainee, request.user)
+        return Response({'message': 'Trainee deleted. Their assignments and messages are being removed.',
+                         'job': jobs.serialize(job)}, status=status.HTTP_202_ACCEPTED)
 
 class MessageInstructorView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+    permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user:
-            return Response({'error': 'User not found'}, status=404)
-
-        instructors = User.objects(role='instructor')
-        if not instructors:
+        user = request.user
+        instructor_ids = list(User.objects(role='instructor').scalar('id'))
+        if not instructor_ids:
             return Response({'error': 'No instructor found.'}, status=status.HTTP_404_NOT_FOUND)
         content = request.data.get('content')
         if not content:
             return Response({'error': 'Content is required.'}, status=400)
-        for instructor in instructors:
-            msg = Message(
-                sender=user,
-                recipient=instructor,
-                content=content
-            )
-            msg.save()
+        # One broadcast document instead of a copy per instructor
+        msg = Message(
+            sender=user,
+            recipients=instructor_ids,
+            content=content
+        )
+        msg.save()
         return Response({'message': 'Message sent to all instructors.'}, status=status.HTTP_201_CREATED)
 
 class InstructorMessagesView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
 
     def get(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user or user.role != 'instructor':
-            return Response({'error': 'User not found or not instructor'}, status=403)
-
-        messages = Message.objects(recipient=user).order_by('-timestamp')
+        user = request.user
+        # Only the referenced ids are needed, so skip dereferencing sender/recipient
+        paginator = KeysetPagination(ordering=('-timestamp', '-_id'))
+        messages = paginator.paginate_queryset(
+            Message.objects(Q(recipient=user) | Q(recipients=user)).no_dereference(), request
+        )
         # Convert ObjectId to str in the response
         data = []
         for msg in messages:
             data.append({
                 'id': str(msg.id),
                 'sender': str(msg.sender.id),
-                'recipient': str(msg.recipient.id),
+                'recipient': str(msg.recipient.id) if msg.recipient else str(user.id),
                 'content': msg.content,
                 'timestamp': msg.timestamp.isoformat() if msg.timestamp else None,
             })
-        return Response(data)
+        return paginator.get_paginated_response(data)
 
 class InstructorReplyView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -749,7 +555,9 @@ class InstructorReplyView(APIView):
         if request.user.role != 'instructor':
             return Response({'error': 'Only instructors can reply.'}, status=403)
         try:
-            original = Message.objects.get(id=message_id, recipient=request.user)
+            original = Message.objects.get(
+                Q(recipient=request.user) | Q(recipients=request.user), id=message_id
+            )
         except Message.DoesNotExist:
             return Response({'error': 'Message not found.'}, status=404)
         content = request.data.get('content')
@@ -763,62 +571,133 @@ class InstructorReplyView(APIView):
         return Response(MessageSerializer(reply).data, status=201)
 
 class TraineeMessagesView(APIView):
-    permission_classes = [permissions.AllowAny]  # JWT-based
+    permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        # Extract JWT from Authorization header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return Response({'error': 'Authorization header missing'}, status=401)
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Invalid token'}, status=401)
-
-        user = User.objects(id=payload['user_id']).first()
-        if not user:
-            return Response({'error': 'User not found'}, status=404)
-
-        # Use MongoEngine's __raw__ for OR queries
-        messages = Message.objects(__raw__={'$or': [{'sender': user.id}, {'recipient': user.id}]}).order_by('timestamp')
+        user = request.user
+        # Use MongoEngine's __raw__ for OR queries; newest first so the first page holds the latest messages
+        paginator = KeysetPagination(ordering=('-timestamp', '-_id'))
+        messages = paginator.paginate_queryset(
+            Message.objects(__raw__={'$or': [
+                {'sender': user.id}, {'recipient': user.id}, {'recipients': user.id},
+            ]}), request
+        )
+        request_identity_map = identity_map(request)
+        request_identity_map.add(user)
         data = []
-        for msg in messages:
+        for msg in request_identity_map.prefetch(messages, 'sender', 'recipient'):
+            recipient = {
+                'id': str(msg.recipient.id),
+                'username': msg.recipient.username,
+                'role': msg.recipient.role,
+            } if msg.recipient else None
+            if recipient is None and msg._data.get('recipients'):
+                recipient = broadcast_recipient(
+                    msg._data['recipients'], msg.sender.id if msg.sender else None, user.id,
+                    {'id': str(user.id), 'username': user.username, 'role': user.role},
+                )
             data.append({
                 'id': str(msg.id),
                 'sender': {
                     'id': str(msg.sender.id),
                     'username': msg.sender.username,
                     'role': msg.sender.role,
-                },
-                'recipient': {
-                    'id': str(msg.recipient.id),
-                    'username': msg.recipient.username,
-                    'role': msg.recipient.role,
-                },
+                } if msg.sender else None,
+                'recipient': recipient,
                 'content': msg.content,
                 'timestamp': msg.timestamp.isoformat() if msg.timestamp else None,
             })
-        return Response(data)
+        return paginator.get_paginated_response(data)
+
+class ExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsInstructor]
+
+    def get(self, request, dataset, fmt):
+        if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+            return Response({'error': 'Unknown export.'}, status=404)
+        query = {}
+        try:
+            for param, field in (('module_id', 'module'), ('trainee_id', 'trainee')):
+                if dataset == 'assignments' and request.query_params.get(param):
+                    query[field] = ObjectId(request.query_params[param])
+        except InvalidId:
+            return Response({'error': 'Invalid id.'}, status=400)
+        chunks, content_type = exports.export(dataset, fmt, query)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+        return response
 
 class SuperAdminDashboardView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsSuperAdmin]
     def get(self, request):
-        trainee_count = User.objects.filter(role='trainee').count()
-        instructor_count = User.objects.filter(role='instructor').count()
+        users = routing.collection(User, routing.ANALYTIC)
+        trainee_count = users.count_documents({'role': 'trainee'})
+        instructor_count = users.count_documents({'role': 'instructor'})
         return Response({
             'trainee_count': trainee_count,
             'instructor_count': instructor_count,
         })
 
+class JobCreateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    # Job kinds that can be started through the API, and who may start them
+    roles_by_kind = {
+        tasks.BULK_ASSIGN: ('instructor',),
+        tasks.REBUILD_PROGRESS_COUNTERS: ('superadmin',),
+        snapshots.REFRESH: ('superadmin',),
+    }
+
+    def post(self, request):
+        kind = request.data.get('kind')
+        params = request.data.get('params') or {}
+        if kind not in self.roles_by_kind:
+            return Response({'error': f'Unknown job kind: {kind}'}, status=400)
+        if request.user.role not in self.roles_by_kind[kind]:
+            return Response({'error': 'You do not have permission to start this job.'}, status=403)
+        if not isinstance(params, dict):
+            return Response({'error': 'params must be an object'}, status=400)
+        if kind == tasks.BULK_ASSIGN:
+            trainee_ids, module_ids, error = bulk_assign_ids(params)
+            if error:
+                return Response({'error': error}, status=400)
+            params = {
+                'trainee_ids': [str(pk) for pk in trainee_ids],
+                'module_ids': [str(pk) for pk in module_ids],
+                'assigned_by': str(request.user.pk),
+            }
+        else:
+            params = {}
+        job = jobs.enqueue(kind, params, request.user)
+        return Response(jobs.serialize(job), status=status.HTTP_202_ACCEPTED)
+
+class JobDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    def get(self, request, job_id):
+        try:
+            job = Job.objects(id=ObjectId(job_id)).first()
+        except InvalidId:
+            job = None
+        # Jobs are visible to whoever started them and to superadmins
+        if not job or (job.created_by != request.user.pk and request.user.role != 'superadmin'):
+            return Response({'error': 'Job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(jobs.serialize(job))
+
+class MongoPoolMetricsView(APIView):
+    # Connection pool stats for the worker process that serves the request
+    permission_classes = [permissions.IsAuthenticated, IsSuperAdmin]
+    def get(self, request):
+        return Response(pool_metrics.snapshot())
+
 class UserListView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsSuperAdmin]
     def get(self, request):
-        users = User.objects.filter(role__in=['trainee', 'instructor'])
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        fields = fieldsets.select(request, UserSerializer)
+        paginator = KeysetPagination()
+        users = paginator.paginate_queryset(
+            User.objects.filter(role__in=['trainee', 'instructor']).only(*fieldsets.projection(fields)), request
+        )
+        serializer = UserSerializer(users, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
 class UserCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsSuperAdmin]
@@ -826,6 +705,7 @@ class UserCreateView(APIView):
         serializer = UserCreateSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
+            snapshots.mark([user.pk])
             return Response(UserSerializer(user).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -839,6 +719,9 @@ class UserUpdateView(APIView):
         serializer = UserUpdateSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            user_cache.invalidate(user.pk)
+            versioning.user_changed(user.pk)
+            snapshots.mark([user.pk])
             return Response(UserSerializer(user).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -848,6 +731,11 @@ class UserDeleteView(APIView):
         try:
             user = User.objects.get(id=user_id, role__in=['trainee', 'instructor'])
             user.delete()
-            return Response({'message': 'User deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
+            user_cache.invalidate(user.pk)
+            versioning.user_changed(user.pk)
+            snapshots.mark([user.pk])
+            job = cascade.user_deleted(user, request.user)
+            return Response({'message': 'User deleted. Their assignments and messages are being removed.',
+                             'job': jobs.serialize(job)}, status=status.HTTP_202_ACCEPTED)
         except User.DoesNotExist:
             return Response({'error': 'User not found.'}, status=status.HTTP_404_NOT_FOUND) 
\ No newline at end of file